@@ -40,6 +40,14 @@ from core.config import settings
 config.set_main_option("sqlalchemy.url", f"{settings.DB_URL}?async_fallback=True")
 
 
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """
+    Skip the SQLite full-text index and its shadow tables. They are
+    created by raw DDL in migrations, autogenerate would drop them
+    """
+    return not (type_ == "table" and name.startswith("posts_fts"))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -58,6 +66,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -65,7 +74,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
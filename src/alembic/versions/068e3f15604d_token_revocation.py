@@ -0,0 +1,77 @@
+"""token revocation
+
+Revision ID: 068e3f15604d
+Revises: 8835bfabf737
+Create Date: 2026-10-18 13:41:52.118630
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "068e3f15604d"
+down_revision: Union[str, Sequence[str], None] = "8835bfabf737"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(length=64), nullable=False),
+        sa.Column("expires_at", sa.Integer(), nullable=False),
+        sa.Column("revoked_at", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("jti"),
+    )
+    op.create_index(
+        op.f("ix_revoked_tokens_expires_at"),
+        "revoked_tokens",
+        ["expires_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_revoked_tokens_revoked_at"),
+        "revoked_tokens",
+        ["revoked_at"],
+        unique=False,
+    )
+    op.create_table(
+        "token_watermarks",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("issued_before", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_index(
+        op.f("ix_token_watermarks_issued_before"),
+        "token_watermarks",
+        ["issued_before"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_token_watermarks_issued_before"),
+        table_name="token_watermarks",
+    )
+    op.drop_table("token_watermarks")
+    op.drop_index(
+        op.f("ix_revoked_tokens_revoked_at"),
+        table_name="revoked_tokens",
+    )
+    op.drop_index(
+        op.f("ix_revoked_tokens_expires_at"),
+        table_name="revoked_tokens",
+    )
+    op.drop_table("revoked_tokens")
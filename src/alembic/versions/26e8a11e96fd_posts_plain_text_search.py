@@ -0,0 +1,139 @@
+"""posts plain text search
+
+Revision ID: 26e8a11e96fd
+Revises: 9e1ab6f178fc
+Create Date: 2026-10-18 18:12:45.902114
+
+"""
+
+import html
+from typing import Sequence, Union
+
+import bleach
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "26e8a11e96fd"
+down_revision: Union[str, Sequence[str], None] = "9e1ab6f178fc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+posts = sa.table(
+    "posts",
+    sa.column("id", sa.Integer),
+    sa.column("content", sa.String),
+    sa.column("plain_text", sa.String),
+)
+
+DROP_FTS = (
+    "DROP TRIGGER IF EXISTS posts_fts_update",
+    "DROP TRIGGER IF EXISTS posts_fts_delete",
+    "DROP TRIGGER IF EXISTS posts_fts_insert",
+    "DROP TABLE IF EXISTS posts_fts",
+)
+
+
+def create_fts(column: str, update_of: str) -> None:
+    """
+    Create the index over `title` and `column` of posts and fill it
+    """
+    op.execute(
+        f"""
+        CREATE VIRTUAL TABLE posts_fts USING fts5(
+            title, {column}, content='posts', content_rowid='id'
+        )
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts
+        BEGIN
+            INSERT INTO posts_fts(rowid, title, {column})
+            VALUES (new.id, new.title, new.{column});
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts
+        BEGIN
+            INSERT INTO posts_fts(posts_fts, rowid, title, {column})
+            VALUES ('delete', old.id, old.title, old.{column});
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER posts_fts_update AFTER UPDATE{update_of} ON posts
+        BEGIN
+            INSERT INTO posts_fts(posts_fts, rowid, title, {column})
+            VALUES ('delete', old.id, old.title, old.{column});
+            INSERT INTO posts_fts(rowid, title, {column})
+            VALUES (new.id, new.title, new.{column});
+        END
+        """
+    )
+    op.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+
+
+def plain_text(content: str) -> str:
+    return " ".join(
+        html.unescape(bleach.clean(content, tags=[], strip=True)).split()
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    sqlite = op.get_bind().dialect.name == "sqlite"
+
+    if sqlite:
+        for statement in DROP_FTS:
+            op.execute(statement)
+
+    op.add_column(
+        "posts",
+        sa.Column(
+            "plain_text",
+            sa.String(),
+            server_default="",
+            nullable=False,
+        ),
+    )
+
+    # Stored HTML is already sanitized, so stripping its tags gives
+    # the same text as rendering would
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(posts.c.id, posts.c.content)).all()
+
+    if rows:
+        connection.execute(
+            posts.update()
+            .where(posts.c.id == sa.bindparam("b_id"))
+            .values(plain_text=sa.bindparam("b_plain_text")),
+            [
+                {"b_id": id, "b_plain_text": plain_text(content)}
+                for id, content in rows
+            ],
+        )
+
+    if sqlite:
+        create_fts("plain_text", " OF title, plain_text")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    sqlite = op.get_bind().dialect.name == "sqlite"
+
+    if sqlite:
+        for statement in DROP_FTS:
+            op.execute(statement)
+
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("plain_text")
+
+    if sqlite:
+        create_fts("content", "")
@@ -0,0 +1,69 @@
+"""posts raw content
+
+Revision ID: 2c050530f066
+Revises: 4eabf310a7ba
+Create Date: 2026-10-18 11:42:09.315804
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2c050530f066"
+down_revision: Union[str, Sequence[str], None] = "4eabf310a7ba"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rebuilding `posts` in batch mode drops its triggers on SQLite,
+# the full-text index of 89ca3d8e774e is kept up to date by these
+POSTS_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts
+    BEGIN
+        INSERT INTO posts_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts
+    BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE ON posts
+    BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO posts_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("posts", sa.Column("raw_content", sa.String(), nullable=True))
+    op.add_column(
+        "posts",
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("content_hash")
+        batch_op.drop_column("raw_content")
+
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in POSTS_FTS_TRIGGERS:
+            op.execute(statement)
@@ -0,0 +1,91 @@
+"""posts markdown summary
+
+Revision ID: 3471566fb809
+Revises: 2c050530f066
+Create Date: 2026-10-18 12:20:41.628157
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3471566fb809"
+down_revision: Union[str, Sequence[str], None] = "2c050530f066"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rebuilding `posts` in batch mode drops its triggers on SQLite,
+# the full-text index of 89ca3d8e774e is kept up to date by these
+POSTS_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts
+    BEGIN
+        INSERT INTO posts_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts
+    BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE ON posts
+    BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO posts_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "posts",
+        sa.Column("excerpt", sa.String(), server_default="", nullable=False),
+    )
+    op.add_column(
+        "posts",
+        sa.Column(
+            "word_count",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "posts",
+        sa.Column(
+            "reading_time",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+
+    # Posts rendered before have no summary, but their hash would make
+    # `render_posts` skip them. It renders posts without a hash again
+    op.execute("UPDATE posts SET content_hash = NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("reading_time")
+        batch_op.drop_column("word_count")
+        batch_op.drop_column("excerpt")
+
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in POSTS_FTS_TRIGGERS:
+            op.execute(statement)
@@ -0,0 +1,74 @@
+"""posts and categories version
+
+Revision ID: 4eabf310a7ba
+Revises: 89ca3d8e774e
+Create Date: 2026-10-18 10:58:37.104925
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4eabf310a7ba"
+down_revision: Union[str, Sequence[str], None] = "89ca3d8e774e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rebuilding `posts` in batch mode drops its triggers on SQLite,
+# the full-text index of 89ca3d8e774e is kept up to date by these
+POSTS_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts
+    BEGIN
+        INSERT INTO posts_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts
+    BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE ON posts
+    BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO posts_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "categories",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "posts",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("version")
+
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in POSTS_FTS_TRIGGERS:
+            op.execute(statement)
+
+    with op.batch_alter_table("categories") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,39 @@
+"""users token version
+
+Revision ID: 8835bfabf737
+Revises: 3471566fb809
+Create Date: 2026-10-18 13:05:17.402913
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8835bfabf737"
+down_revision: Union[str, Sequence[str], None] = "3471566fb809"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column(
+            "token_version",
+            sa.Integer(),
+            server_default="1",
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("token_version")
@@ -0,0 +1,73 @@
+"""posts full-text search
+
+Revision ID: 89ca3d8e774e
+Revises: 1edb624c2ca8
+Create Date: 2026-10-18 10:40:12.481207
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "89ca3d8e774e"
+down_revision: Union[str, Sequence[str], None] = "1edb624c2ca8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE posts_fts USING fts5(
+            title, content, content='posts', content_rowid='id'
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts
+        BEGIN
+            INSERT INTO posts_fts(rowid, title, content)
+            VALUES (new.id, new.title, new.content);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts
+        BEGIN
+            INSERT INTO posts_fts(posts_fts, rowid, title, content)
+            VALUES ('delete', old.id, old.title, old.content);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER posts_fts_update AFTER UPDATE ON posts
+        BEGIN
+            INSERT INTO posts_fts(posts_fts, rowid, title, content)
+            VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO posts_fts(rowid, title, content)
+            VALUES (new.id, new.title, new.content);
+        END
+        """
+    )
+    op.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS posts_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS posts_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS posts_fts_insert")
+    op.execute("DROP TABLE IF EXISTS posts_fts")
@@ -0,0 +1,43 @@
+"""post listing indexes
+
+Revision ID: 9e1ab6f178fc
+Revises: ebbf1dc87e21
+Create Date: 2026-10-18 16:24:09.553817
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e1ab6f178fc"
+down_revision: Union[str, Sequence[str], None] = "ebbf1dc87e21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_post_category_category_slug_post_id"),
+        "post_category",
+        ["category_slug", "post_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_posts_author_id_id"),
+        "posts",
+        ["author_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_posts_author_id_id"), table_name="posts")
+    op.drop_index(
+        op.f("ix_post_category_category_slug_post_id"),
+        table_name="post_category",
+    )
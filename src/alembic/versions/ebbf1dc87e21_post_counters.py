@@ -0,0 +1,125 @@
+"""post counters
+
+Revision ID: ebbf1dc87e21
+Revises: 068e3f15604d
+Create Date: 2026-10-18 15:02:37.481206
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ebbf1dc87e21"
+down_revision: Union[str, Sequence[str], None] = "068e3f15604d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COUNTED_TABLES = ("categories", "users")
+
+# Rebuilding `posts` in batch mode drops its triggers on SQLite,
+# the full-text index of 89ca3d8e774e is kept up to date by these
+POSTS_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts
+    BEGIN
+        INSERT INTO posts_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts
+    BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE ON posts
+    BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO posts_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "posts",
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+    for table_name in COUNTED_TABLES:
+        op.add_column(
+            table_name,
+            sa.Column(
+                "post_count",
+                sa.Integer(),
+                server_default="0",
+                nullable=False,
+            ),
+        )
+        op.add_column(
+            table_name,
+            sa.Column("last_post_id", sa.Integer(), nullable=True),
+        )
+        op.add_column(
+            table_name,
+            sa.Column(
+                "last_post_at",
+                sa.DateTime(timezone=True),
+                nullable=True,
+            ),
+        )
+
+    # Creation time of existing posts is unknown, so only counts
+    # and IDs of last posts are backfilled
+    op.execute(
+        """
+        UPDATE categories SET
+            post_count = (
+                SELECT count(*) FROM post_category
+                WHERE post_category.category_slug = categories.slug
+            ),
+            last_post_id = (
+                SELECT max(post_id) FROM post_category
+                WHERE post_category.category_slug = categories.slug
+            )
+        """
+    )
+    op.execute(
+        """
+        UPDATE users SET
+            post_count = (
+                SELECT count(*) FROM posts WHERE posts.author_id = users.id
+            ),
+            last_post_id = (
+                SELECT max(id) FROM posts WHERE posts.author_id = users.id
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in reversed(COUNTED_TABLES):
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column("last_post_at")
+            batch_op.drop_column("last_post_id")
+            batch_op.drop_column("post_count")
+
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("created_at")
+
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in POSTS_FTS_TRIGGERS:
+            op.execute(statement)
@@ -1,34 +1,76 @@
-from authx import TokenPayload
+from typing import Awaitable, Callable
+
 from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth import services
 from auth.models import User
+from auth.services import TokenClaims
 from core.config import auth
-from core.database import get_scoped_session
+from core.database import get_session
+from core.ratelimit import rate_limiter
 
 
-async def get_user_by_JWT_token(
+async def get_token_claims(
     request: Request,
-    session: AsyncSession = Depends(get_scoped_session),
-) -> User:
+    session: AsyncSession = Depends(get_session),
+) -> TokenClaims:
     """
-    Due `AuthX.set_subject_getter` as the recommended way
-    to get a user by JWT token works synchronously,
-    use this workaround to call the user in asynchronous functions
+    Authorize a request by claims of its access token only.
+    Signatures are verified once per token and cached, revocations
+    are checked in memory, so a repeated token costs no queries
     """
+    request_token = await auth.get_access_token_from_request(request)
+    claims = services.verified_tokens.get(request_token.token)
+
+    if claims is None:
+        payload = auth.verify_token(request_token, verify_csrf=False)
+
+        try:
+            claims = await services.get_token_claims(session, payload)
+        except ValueError as exc:
+            detail = "Invalid token, please login again"
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, detail) from exc
+
+        services.verified_tokens.set(request_token.token, claims)
+
+    version = await services.get_token_version(session, claims.id)
+
+    if not services.claims_are_current(claims, version):
+        detail = "Token is outdated, please login again"
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail)
+
+    if services.is_revoked(claims):
+        detail = "Token has been revoked, please login again"
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail)
+
+    return claims
 
-    try:
-        token: TokenPayload = await auth._auth_required(request=request)
-        user_id = int(token.sub)
-    except ValueError as exc:
-        detail = "Invalid token, please login again"
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail) from exc
 
-    user = await services.get_user_by_id(session, user_id)
+async def get_user_by_JWT_token(
+    claims: TokenClaims = Depends(get_token_claims),
+    session: AsyncSession = Depends(get_session),
+) -> User:
+    """
+    Same as `get_token_claims`, for handlers that need the user row itself
+    """
+    user = await services.get_cached_user_by_id(session, claims.id)
 
     if user is None:
-        detail = f"User with ID '{user_id}' is not found"
+        detail = f"User with ID '{claims.id}' is not found"
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail)
 
     return user
+
+
+def limit_by_user(group: str) -> Callable[..., Awaitable[None]]:
+    """
+    Dependency limiting requests of the route group per authorized user
+    """
+
+    async def dependency(
+        claims: TokenClaims = Depends(get_token_claims),
+    ) -> None:
+        await rate_limiter.check(group, f"user:{claims.id}")
+
+    return dependency
@@ -1,9 +1,10 @@
 import enum
+from datetime import datetime
 
-from sqlalchemy import Boolean, Enum, String
+from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from core.database import Model
+from core.database import Base, Model
 
 
 class UserRole(enum.Enum):
@@ -32,10 +33,47 @@ class User(Model):
         default=UserRole.USER,
         nullable=False,
     )
+    # Embedded into access tokens, bumped to invalidate their claims
+    token_version: Mapped[int] = mapped_column(default=1, server_default="1")
     posts = relationship("Post", back_populates="author")
+    # Maintained by blog services together with posts of the user
+    post_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    last_post_id: Mapped[int | None]
+    last_post_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
 
     def __str__(self) -> str:
         return self.email
 
     def __repr__(self) -> str:
         return f"<User({self.id=}, {self.email=}, {self.full_name=}, {self.role.value=})>"
+
+
+class RevokedToken(Base):
+    """
+    Token revoked before its expiry, e.g. on logout.
+    Rows of expired tokens are useless and are purged periodically
+    """
+
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Unix time, same as JWT claims
+    expires_at: Mapped[int] = mapped_column(index=True)
+    revoked_at: Mapped[int] = mapped_column(index=True)
+
+
+class TokenWatermark(Base):
+    """
+    All tokens of the user issued before `issued_before` are revoked
+    """
+
+    __tablename__ = "token_watermarks"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id"),
+        primary_key=True,
+    )
+    # Unix time, same as JWT claims
+    issued_before: Mapped[int] = mapped_column(index=True)
@@ -0,0 +1,67 @@
+import heapq
+import time
+
+
+class RevocationList:
+    """
+    In-memory mirror of revoked tokens: a set of revoked JTIs and
+    a per-user watermark, tokens issued before it are revoked.
+    Checking a token is O(1). JTIs are kept until their tokens expire,
+    `sweep` drops expired ones in order of expiry.
+    All timestamps are Unix time in seconds, as in JWT claims
+    """
+
+    def __init__(self) -> None:
+        self._jtis: set[str] = set()
+        self._expiry: list[tuple[int, str]] = []
+        self._watermarks: dict[int, int] = {}
+        # Time of the last sync with the database
+        self.synced_at = 0
+
+    def __len__(self) -> int:
+        return len(self._jtis)
+
+    def __repr__(self) -> str:
+        return (
+            f"<RevocationList(jtis={len(self._jtis)}, "
+            f"watermarks={len(self._watermarks)})>"
+        )
+
+    def add(self, jti: str, expires_at: int) -> None:
+        if jti not in self._jtis:
+            self._jtis.add(jti)
+            heapq.heappush(self._expiry, (expires_at, jti))
+
+    def set_watermark(self, user_id: int, issued_before: int) -> None:
+        current = self._watermarks.get(user_id, 0)
+        self._watermarks[user_id] = max(current, issued_before)
+
+    def is_revoked(
+        self,
+        jti: str | None,
+        user_id: int,
+        issued_at: int | None,
+    ) -> bool:
+        if jti is not None and jti in self._jtis:
+            return True
+
+        watermark = self._watermarks.get(user_id)
+
+        if watermark is None:
+            return False
+
+        return issued_at is None or issued_at < watermark
+
+    def sweep(self, now: float | None = None) -> int:
+        """
+        Forget JTIs of expired tokens, return how many were dropped
+        """
+        now = time.time() if now is None else now
+        dropped = 0
+
+        while self._expiry and self._expiry[0][0] <= now:
+            _, jti = heapq.heappop(self._expiry)
+            self._jtis.discard(jti)
+            dropped += 1
+
+        return dropped
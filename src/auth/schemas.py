@@ -30,6 +30,12 @@ class RefreshData(BaseModel):
     refresh_token: str
 
 
+class LogoutData(BaseModel):
+    refresh_token: str | None = None
+    # Revoke tokens of all sessions of the user, not only the current one
+    everywhere: bool = False
+
+
 class Tokens(BaseModel):
     access_token: str
     refresh_token: str
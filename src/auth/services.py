@@ -1,17 +1,93 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
 import bcrypt
+from authx import TokenPayload
 from fastapi import HTTPException, status
-from sqlalchemy import Result, select
+from sqlalchemy import Result, delete, inspect, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from auth.models import RevokedToken, TokenWatermark, User, UserRole
+from auth.revocation import RevocationList
+from auth.schemas import RegisterData, Tokens
+from core.cache import TTLCache
+from core.config import auth, settings
+from core.database import session_maker
+from core.executors import BoundedExecutor
+from core.metrics import timed
+
+
+# bcrypt releases the GIL while hashing,
+# so a thread pool is enough to use several cores
+password_executor = BoundedExecutor(
+    settings.PASSWORD_HASHING_WORKERS,
+    name="password-hashing",
+)
+
+
+# Column values of users resolved from JWT tokens, keyed by ID.
+# Entries must be dropped with `invalidate_cached_user` on every user update
+user_cache: TTLCache[int, dict[str, Any]] = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL,
+)
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    """
+    User data embedded into an access token, enough to authorize
+    requests that do not need the user row
+    """
+
+    id: int
+    role: UserRole
+    is_active: bool
+    version: int
+    jti: str | None
+    issued_at: int | None
+    expires_at: int
+
 
-from auth.models import User, UserRole
-from auth.schemas import RegisterData
+# Claims of access tokens whose signature is already verified,
+# keyed by the token itself
+verified_tokens: TTLCache[str, TokenClaims] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL,
+)
+
+# Current token version of users, tokens with another one are outdated
+token_versions: TTLCache[int, int] = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL,
+)
+
+# Mirror of `RevokedToken` and `TokenWatermark` tables,
+# kept in sync by `run_revocation_sync`
+revocation_list = RevocationList()
+
+# Expiry of tokens issued without one
+NEVER_EXPIRES: int = 2**62
+
+logger = logging.getLogger(__name__)
 
 
-def hash_password(password: str) -> str:
+def _hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
 
 
-def is_admin(user: User) -> bool:
+async def hash_password(password: str) -> str:
+    with timed("password"):
+        return await password_executor.run(_hash_password, password)
+
+
+def is_admin(user: User | TokenClaims) -> bool:
     return user.role == UserRole.ADMIN
 
 
@@ -21,17 +97,26 @@ DEFAULT_ACCESS_RESTRICTED_MESSAGE: str = (
 
 
 def is_admin_or_raise_401(
-    user: User,
+    user: User | TokenClaims,
     detail: str = DEFAULT_ACCESS_RESTRICTED_MESSAGE,
 ) -> None:
     if not is_admin(user):
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail)
 
 
-def password_is_valid(password: str, hashed_password: bytes) -> bool:
+def _password_is_valid(password: str, hashed_password: bytes) -> bool:
     return bcrypt.checkpw(password.encode(), hashed_password)
 
 
+async def password_is_valid(password: str, hashed_password: bytes) -> bool:
+    with timed("password"):
+        return await password_executor.run(
+            _password_is_valid,
+            password,
+            hashed_password,
+        )
+
+
 async def get_user_by_email(
     session: AsyncSession,
     email: str,
@@ -47,11 +132,273 @@ async def get_user_by_id(session: AsyncSession, user_id: int) -> User | None:
     return await session.get(User, user_id)
 
 
+async def get_cached_user_by_id(
+    session: AsyncSession,
+    user_id: int,
+) -> User | None:
+    """
+    Same as `get_user_by_id`, but serve user from `user_cache` when possible.
+    The cache keeps plain column values, never an instance bound
+    to a session: a rollback there would expire it for every request.
+    A hit is merged into `session` without loading, so it costs no queries
+    """
+    values = user_cache.get(user_id)
+
+    if values is not None:
+        user = User(**values)
+        make_transient_to_detached(user)
+        return await session.merge(user, load=False)
+
+    user = await get_user_by_id(session, user_id)
+
+    if user is not None:
+        user_cache.set(
+            user_id,
+            {
+                attribute.key: getattr(user, attribute.key)
+                for attribute in inspect(User).column_attrs
+            },
+        )
+
+    return user
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    user_cache.delete(user_id)
+
+
+def unix_time(value: datetime | int | float | None) -> int | None:
+    """
+    Unix time of a JWT timestamp claim
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+
+    return int(value)
+
+
+def create_tokens(user: User) -> Tokens:
+    claims = {
+        "role": user.role.value,
+        "active": user.is_active,
+        "ver": user.token_version,
+    }
+
+    return Tokens(
+        access_token=auth.create_access_token(str(user.id), data=claims),
+        refresh_token=auth.create_refresh_token(str(user.id)),
+    )
+
+
+async def get_token_claims(
+    session: AsyncSession,
+    payload: TokenPayload,
+) -> TokenClaims:
+    """
+    Read claims of a verified access token. Tokens issued
+    before claims were embedded are completed from the user row
+    """
+    user_id = int(payload.sub)
+    extra = payload.model_extra or {}
+    issued_at = unix_time(payload.iat)
+    expires_at = unix_time(payload.exp) or NEVER_EXPIRES
+
+    if "role" in extra:
+        return TokenClaims(
+            id=user_id,
+            role=UserRole(extra["role"]),
+            is_active=extra["active"],
+            version=extra["ver"],
+            jti=payload.jti,
+            issued_at=issued_at,
+            expires_at=expires_at,
+        )
+
+    user = await get_cached_user_by_id(session, user_id)
+
+    if user is None:
+        detail = f"User with ID '{user_id}' is not found"
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail)
+
+    return TokenClaims(
+        id=user.id,
+        role=user.role,
+        is_active=user.is_active,
+        version=user.token_version,
+        jti=payload.jti,
+        issued_at=issued_at,
+        expires_at=expires_at,
+    )
+
+
+async def get_token_version(session: AsyncSession, user_id: int) -> int | None:
+    version = token_versions.get(user_id)
+
+    if version is not None:
+        return version
+
+    # A version read from a lagging replica would be cached
+    # and accept tokens outdated by a recent demotion
+    statement = select(User.token_version).where(User.id == user_id)
+    result = await session.execute(
+        statement,
+        bind_arguments={"primary": True},
+    )
+    version = result.scalar()
+
+    if version is not None:
+        token_versions.set(user_id, version)
+
+    return version
+
+
+def claims_are_current(claims: TokenClaims, version: int | None) -> bool:
+    return (
+        version == claims.version
+        and claims.is_active
+        and claims.expires_at > time.time()
+    )
+
+
+def is_revoked(claims: TokenClaims) -> bool:
+    return revocation_list.is_revoked(claims.jti, claims.id, claims.issued_at)
+
+
+async def revoke_token(
+    session: AsyncSession,
+    jti: str,
+    expires_at: int,
+) -> None:
+    await session.merge(
+        RevokedToken(
+            jti=jti,
+            expires_at=expires_at,
+            revoked_at=int(time.time()),
+        )
+    )
+    await session.commit()
+
+    revocation_list.add(jti, expires_at)
+
+
+async def use_refresh_token(
+    session: AsyncSession,
+    jti: str,
+    expires_at: int,
+) -> None:
+    """
+    Revoke a refresh token exchanged for new tokens. Unlike `revoke_token`
+    the row is inserted, not merged, so when the token is replayed
+    to another process, which has not synced the revocation yet,
+    only the first exchange commits
+    """
+    session.add(
+        RevokedToken(
+            jti=jti,
+            expires_at=expires_at,
+            revoked_at=int(time.time()),
+        )
+    )
+
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        revocation_list.add(jti, expires_at)
+        raise ValueError("Refresh token has already been used")
+
+    revocation_list.add(jti, expires_at)
+
+
+async def _add_watermark(session: AsyncSession, user_id: int) -> int:
+    """
+    Revoke tokens of the user issued up to now. Issue time of tokens
+    has a precision of a second, so the watermark is the next second:
+    tokens issued within the current one are revoked too, even the ones
+    issued right after the watermark
+    """
+    issued_before = int(time.time()) + 1
+    await session.merge(
+        TokenWatermark(user_id=user_id, issued_before=issued_before)
+    )
+
+    return issued_before
+
+
+async def revoke_user_tokens(session: AsyncSession, user_id: int) -> None:
+    """
+    Revoke every token issued to the user so far
+    """
+    issued_before = await _add_watermark(session, user_id)
+    await session.commit()
+
+    revocation_list.set_watermark(user_id, issued_before)
+
+
+async def sync_revocations(session: AsyncSession) -> None:
+    """
+    Load revocations stored since the previous sync, including ones
+    made by other processes, and forget expired tokens.
+    Sync periods overlap, loading a revocation twice is harmless
+    """
+    now = int(time.time())
+    since = revocation_list.synced_at - int(settings.REVOCATION_SYNC_INTERVAL)
+
+    tokens = await session.execute(
+        select(RevokedToken.jti, RevokedToken.expires_at).where(
+            RevokedToken.revoked_at >= since,
+            RevokedToken.expires_at > now,
+        )
+    )
+
+    for jti, expires_at in tokens:
+        revocation_list.add(jti, expires_at)
+
+    watermarks = await session.execute(
+        select(TokenWatermark.user_id, TokenWatermark.issued_before).where(
+            TokenWatermark.issued_before >= since
+        )
+    )
+
+    for user_id, issued_before in watermarks:
+        revocation_list.set_watermark(user_id, issued_before)
+
+    revocation_list.synced_at = now
+    revocation_list.sweep(now)
+
+
+async def purge_expired_revocations(session: AsyncSession) -> None:
+    statement = delete(RevokedToken).where(
+        RevokedToken.expires_at <= int(time.time())
+    )
+    await session.execute(statement)
+    await session.commit()
+
+
+async def run_revocation_sync(interval: float) -> None:
+    """
+    Sync `revocation_list` with the database every `interval` seconds
+    until cancelled
+    """
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            async with session_maker() as session:
+                await sync_revocations(session)
+                await purge_expired_revocations(session)
+        except SQLAlchemyError:
+            logger.exception("Failed to sync revoked tokens")
+
+
 async def register_new_user(session: AsyncSession, data: RegisterData) -> User:
     data_as_dict = data.model_dump()
     password: str = data_as_dict.pop("password")
 
-    user = User(**data_as_dict, password=hash_password(password))
+    user = User(**data_as_dict, password=await hash_password(password))
 
     session.add(user)
     await session.commit()
@@ -65,8 +412,24 @@ async def set_user_role(
     user: User,
     role: UserRole,
 ) -> User:
+    demoted = is_admin(user) and role != UserRole.ADMIN
+    issued_before = None
+
     user.role = role
+    # Role is embedded into access tokens, outdate them
+    user.token_version += 1
+
+    # Demoted user must not keep admin rights through refresh tokens
+    if demoted:
+        issued_before = await _add_watermark(session, user.id)
+
     await session.commit()
     await session.refresh(user)
 
+    invalidate_cached_user(user.id)
+    token_versions.set(user.id, user.token_version)
+
+    if issued_before is not None:
+        revocation_list.set_watermark(user.id, issued_before)
+
     return user
@@ -4,26 +4,33 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth import services
 from auth.models import User
-from auth.dependencies import get_user_by_JWT_token
+from auth.dependencies import get_token_claims, get_user_by_JWT_token
 from auth.schemas import (
     BaseUser,
     Credentials,
+    LogoutData,
     RefreshData,
     RegisterData,
     SetRole,
     Tokens,
 )
+from auth.services import TokenClaims
 from core.config import auth
-from core.database import get_scoped_session
+from core.database import get_session
+from core.ratelimit import limit_by_ip
 
 
 router = APIRouter(prefix="/auth", tags=["Users"])
 
+# Login, registration and refresh hash passwords or mint tokens,
+# so they are limited per client address before any work is done
+AUTH_RATE_LIMIT = Depends(limit_by_ip("auth"))
 
-@router.post("/login")
+
+@router.post("/login", dependencies=[AUTH_RATE_LIMIT])
 async def login(
     credentials: Credentials,
-    session: AsyncSession = Depends(get_scoped_session),
+    session: AsyncSession = Depends(get_session),
 ) -> Tokens:
     user = await services.get_user_by_email(session, credentials.email)
 
@@ -31,23 +38,20 @@ async def login(
         detail = f"User with email '{credentials.email}' is not found"
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail)
 
-    if not services.password_is_valid(
+    if not await services.password_is_valid(
         credentials.password,
         user.password.encode(),
     ):
         detail = "Invalid email or password"
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail)
 
-    access_token = auth.create_access_token(str(user.id))
-    refresh_token = auth.create_refresh_token(str(user.id))
-
-    return Tokens(access_token=access_token, refresh_token=refresh_token)
+    return services.create_tokens(user)
 
 
-@router.post("/register")
+@router.post("/register", dependencies=[AUTH_RATE_LIMIT])
 async def register(
     data: RegisterData,
-    session: AsyncSession = Depends(get_scoped_session),
+    session: AsyncSession = Depends(get_session),
 ):
     existing_user = await services.get_user_by_email(
         session,
@@ -59,14 +63,16 @@ async def register(
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail)
 
     user = await services.register_new_user(session, data)
-    access_token = auth.create_access_token(str(user.id))
-    refresh_token = auth.create_refresh_token(str(user.id))
 
-    return {"access_token": access_token, "refresh_token": refresh_token}
+    return services.create_tokens(user)
 
 
-@router.post("/refresh")
-async def refresh_token(request: Request, data: RefreshData) -> Tokens:
+@router.post("/refresh", dependencies=[AUTH_RATE_LIMIT])
+async def refresh_token(
+    request: Request,
+    data: RefreshData,
+    session: AsyncSession = Depends(get_session),
+) -> Tokens:
     try:
         try:
             refresh_payload = await auth.refresh_token_required(request)
@@ -84,16 +90,75 @@ async def refresh_token(request: Request, data: RefreshData) -> Tokens:
                 verify_type=True,
             )
 
-        access_token = auth.create_access_token(refresh_payload.sub)
-        refresh_token = auth.create_refresh_token(refresh_payload.sub)
+        user_id = int(refresh_payload.sub)
+        issued_at = services.unix_time(refresh_payload.iat)
+
+        if services.revocation_list.is_revoked(
+            refresh_payload.jti,
+            user_id,
+            issued_at,
+        ):
+            raise ValueError("Refresh token has been revoked")
+
+        # Claims of the new access token are taken from the current user row
+        user = await services.get_user_by_id(session, user_id)
+
+        if user is None:
+            raise ValueError(f"User with ID '{user_id}' is not found")
+
+        # Refresh tokens are single use, a new one is issued instead
+        if refresh_payload.jti is not None:
+            await services.use_refresh_token(
+                session,
+                refresh_payload.jti,
+                services.unix_time(refresh_payload.exp)
+                or services.NEVER_EXPIRES,
+            )
 
-        return Tokens(access_token=access_token, refresh_token=refresh_token)
+        return services.create_tokens(user)
 
     except Exception as exc:
         detail = {"error": str(exc), "type": type(exc).__name__}
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail)
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    data: LogoutData | None = None,
+    claims: TokenClaims = Depends(get_token_claims),
+    session: AsyncSession = Depends(get_session),
+) -> None:
+    data = data or LogoutData()
+
+    if claims.jti is not None:
+        await services.revoke_token(session, claims.jti, claims.expires_at)
+
+    if data.everywhere:
+        await services.revoke_user_tokens(session, claims.id)
+        return
+
+    if data.refresh_token is None:
+        return
+
+    request_token = RequestToken(
+        token=data.refresh_token,
+        type="refresh",
+        location=auth.config.JWT_TOKEN_LOCATION[0],
+    )
+    refresh_payload = auth.verify_token(request_token, verify_csrf=False)
+
+    if refresh_payload.sub != str(claims.id):
+        detail = "Refresh token belongs to another user"
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail)
+
+    if refresh_payload.jti is not None:
+        await services.revoke_token(
+            session,
+            refresh_payload.jti,
+            services.unix_time(refresh_payload.exp) or services.NEVER_EXPIRES,
+        )
+
+
 @router.get("/me")
 async def get_authenticated_user_profile(
     user: User = Depends(get_user_by_JWT_token),
@@ -108,10 +173,10 @@ async def get_authenticated_user_profile(
 @router.post("/set-role")
 async def set_user_role(
     data: SetRole,
-    user: User = Depends(get_user_by_JWT_token),
-    session: AsyncSession = Depends(get_scoped_session),
+    claims: TokenClaims = Depends(get_token_claims),
+    session: AsyncSession = Depends(get_session),
 ) -> None:
-    services.is_admin_or_raise_401(user)
+    services.is_admin_or_raise_401(claims)
 
     target = await services.get_user_by_email(session, data.user_email)
 
@@ -0,0 +1,256 @@
+"""
+Latency and throughput benchmark of the API. Seeds a fresh database
+through the services, drives `main.app` in-process with concurrent
+httpx clients and reports p50/p95/p99 latency and requests per second
+of every scenario. Results are saved as JSON to compare between commits.
+
+Usage: python -m benchmarks.api [--posts 1000] [--compare old.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+
+RESULTS_DIR = Path(__file__).parent / "results"
+COMPARED = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+Scenario = Callable[["httpx.AsyncClient", int], Awaitable["httpx.Response"]]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentile(latencies: list[float], percent: int) -> float:
+    if len(latencies) < 2:
+        return latencies[0] * 1000 if latencies else 0.0
+
+    return statistics.quantiles(latencies, n=100)[percent - 1] * 1000
+
+
+async def _seed(args: argparse.Namespace) -> list[dict]:
+    from auth import services as auth_services
+    from auth.models import UserRole
+    from auth.schemas import RegisterData
+    from blog import services as blog_services
+    from blog.schemas import CategoryCreate, PostCreate
+    from core.database import create_tables, session_maker
+
+    await create_tables()
+
+    users = [
+        {"email": f"user{i}@example.com", "password": f"password{i}"}
+        for i in range(args.users)
+    ]
+
+    async with session_maker() as session:
+        registered = [
+            await auth_services.register_new_user(session, RegisterData(**user))
+            for user in users
+        ]
+        admin = await auth_services.set_user_role(
+            session,
+            registered[0],
+            UserRole.ADMIN,
+        )
+
+        for i in range(args.categories):
+            await blog_services.create_category(
+                session,
+                CategoryCreate(name=f"Category {i}", slug=f"category_{i}"),
+            )
+
+        await blog_services.import_posts(
+            session,
+            admin,
+            [
+                PostCreate(
+                    title=f"Post {i}",
+                    slug=f"post-{i}",
+                    content=f"<p>{'Lorem ipsum dolor sit amet. ' * 20}</p>",
+                    categories=random.sample(
+                        [f"category_{i}" for i in range(args.categories)],
+                        k=min(2, args.categories),
+                    ),
+                )
+                for i in range(args.posts)
+            ],
+            chunk_size=1000,
+        )
+
+    return users
+
+
+async def _run_scenario(
+    client: "httpx.AsyncClient",
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+
+        for i in counter:
+            started_at = time.perf_counter()
+            response = await scenario(client, i)
+            latencies.append(time.perf_counter() - started_at)
+
+            if response.status_code >= 400:
+                errors += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from main import app
+
+    users = await _seed(args)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://benchmark/api/v1",
+    ) as client:
+        response = await client.post("/auth/login", json=users[0])
+        admin = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        categories = [f"category_{i}" for i in range(args.categories)]
+        run_id = random.getrandbits(32)
+
+        scenarios: dict[str, Scenario] = {
+            "login": lambda client, i: client.post(
+                "/auth/login",
+                json=random.choice(users),
+            ),
+            "me": lambda client, i: client.get("/auth/me", headers=admin),
+            "list_posts": lambda client, i: client.get("/posts/"),
+            "post_by_id": lambda client, i: client.get(
+                f"/posts/{random.randint(1, args.posts)}"
+            ),
+            "create_post": lambda client, i: client.post(
+                "/posts/",
+                json={
+                    "title": f"Benchmark {i}",
+                    "slug": f"benchmark-{run_id}-{i}",
+                    "content": "<p>Benchmark</p>",
+                    "categories": random.sample(categories, k=1),
+                },
+                headers=admin,
+            ),
+            "update_post": lambda client, i: client.patch(
+                f"/posts/{random.randint(1, args.posts)}",
+                json={"title": f"Updated {i}"},
+                headers=admin,
+            ),
+        }
+        results = {}
+
+        for name, scenario in scenarios.items():
+            requests = args.logins if name == "login" else args.requests
+            results[name] = await _run_scenario(
+                client,
+                scenario,
+                requests,
+                args.concurrency,
+            )
+            print(name, results[name], flush=True)
+
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "parameters": {
+            "users": args.users,
+            "posts": args.posts,
+            "categories": args.categories,
+            "requests": args.requests,
+            "logins": args.logins,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict) -> None:
+    print(f"\n{'scenario':<12}" + "".join(f"{key:>22}" for key in COMPARED))
+
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+
+        if old is None:
+            continue
+
+        columns = [f"{old[key]} -> {result[key]}" for key in COMPARED]
+        print(f"{name:<12}" + "".join(f"{column:>22}" for column in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument(
+        "--logins",
+        type=int,
+        default=100,
+        help="Login is bcrypt-bound, so it gets fewer requests",
+    )
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Settings are read on import, so the database of the benchmark
+        # must be set before the application is imported. Rate limits
+        # are disabled, all requests come from one client
+        os.environ["DB_URL"] = (
+            f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.sqlite'}"
+        )
+        os.environ["RATE_LIMITS"] = "{}"
+        report = asyncio.run(run(args))
+
+    output = args.output or RESULTS_DIR / f"{report['commit'] or 'latest'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults are saved to {output}")
+
+    if args.compare is not None:
+        compare(report, json.loads(args.compare.read_text()))
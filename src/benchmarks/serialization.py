@@ -0,0 +1,142 @@
+"""
+Measure cost of serializing 1,000 post summaries to a JSON response
+body the way blog views did it before (a validated schema per post, validated
+again by FastAPI against the return annotation) and the way they do now
+(schemas built without validation and dumped by one `TypeAdapter` call,
+or plain dicts of requested fields for sparse listings).
+
+Usage: python -m benchmarks.serialization [--posts 1000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from auth.models import User
+from blog import services
+from blog.models import Category, Post
+from blog.schemas import Category as CategorySchema
+from blog.schemas import PostSummary
+from blog.views import (
+    _page_to_json,
+    _post_to_summary,
+    post_summaries_adapter,
+)
+
+
+def _make_posts(count: int) -> list[Post]:
+    author = User(id=1, email="author@example.com")
+    categories = [
+        Category(name=f"Category {i}", slug=f"category-{i}") for i in range(3)
+    ]
+
+    return [
+        Post(
+            id=i,
+            author_id=author.id,
+            author=author,
+            title=f"Post {i}",
+            slug=f"post-{i}",
+            content=f"<p>{'Lorem ipsum dolor sit amet. ' * 50}</p>",
+            excerpt="Lorem ipsum dolor sit amet. " * 10,
+            word_count=250,
+            reading_time=2,
+            version=1,
+            categories=categories[: i % 3 + 1],
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def _validated_summary(post: Post) -> PostSummary:
+    return PostSummary(
+        id=post.id,
+        title=post.title,
+        slug=post.slug,
+        excerpt=post.excerpt,
+        word_count=post.word_count,
+        reading_time=post.reading_time,
+        categories=[
+            CategorySchema(name=category.name, slug=category.slug)
+            for category in post.categories
+        ],
+        author=post.author.email,
+    )
+
+
+async def _before(posts: list[Post]) -> bytes:
+    field = create_model_field("Response", list[PostSummary])
+    content = await serialize_response(
+        field=field,
+        response_content=[_validated_summary(post) for post in posts],
+    )
+    return JSONResponse(content).body
+
+
+async def _adapter(posts: list[Post]) -> bytes:
+    return post_summaries_adapter.dump_json(
+        [await _post_to_summary(post) for post in posts]
+    )
+
+
+async def _projection(posts: list[Post]) -> bytes:
+    return _page_to_json(posts, None, services.SUMMARY_FIELDS)
+
+
+async def measure(
+    serialize: Callable[[list[Post]], Awaitable[bytes]],
+    posts: list[Post],
+    repeat: int,
+) -> dict:
+    timings = []
+
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        body = await serialize(posts)
+        timings.append(time.perf_counter() - started_at)
+
+    per_thousand = 1000 / len(posts)
+
+    return {
+        "median_ms_per_1000": round(
+            statistics.median(timings) * 1000 * per_thousand, 2
+        ),
+        "min_ms_per_1000": round(min(timings) * 1000 * per_thousand, 2),
+        "bytes": len(body),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    posts = _make_posts(args.posts)
+    modes = {
+        "before": _before,
+        "adapter": _adapter,
+        "projection": _projection,
+    }
+    results = {
+        mode: await measure(serialize, posts, args.repeat)
+        for mode, serialize in modes.items()
+    }
+
+    print(json.dumps(results, indent=2))
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
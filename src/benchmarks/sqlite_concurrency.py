@@ -0,0 +1,164 @@
+"""
+Compare SQLite read/write throughput under concurrency
+with default engine settings and with SQLite production mode
+(WAL, tuned pragmas and a single writer connection).
+
+Usage: python -m benchmarks.sqlite_concurrency [--writers 8] [--readers 32]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from auth.models import User
+from blog.models import Post
+from core.database import Base, create_engine
+
+
+SEED_POSTS = 1000
+
+
+async def _writer(engine: AsyncEngine, deadline: float, stats: dict) -> None:
+    while time.perf_counter() < deadline:
+        started_at = time.perf_counter()
+
+        try:
+            async with engine.begin() as connection:
+                await connection.execute(
+                    insert(Post).values(
+                        title="Benchmark",
+                        slug=f"benchmark-{random.getrandbits(64)}",
+                        content="<p>Benchmark</p>",
+                    )
+                )
+        except OperationalError:
+            stats["write_errors"] += 1
+            continue
+
+        stats["writes"] += 1
+        stats["write_latencies"].append(time.perf_counter() - started_at)
+
+
+async def _reader(engine: AsyncEngine, deadline: float, stats: dict) -> None:
+    while time.perf_counter() < deadline:
+        started_at = time.perf_counter()
+
+        try:
+            async with engine.connect() as connection:
+                statement = select(Post).where(
+                    Post.id == random.randint(1, SEED_POSTS)
+                )
+                (await connection.execute(statement)).all()
+        except OperationalError:
+            stats["read_errors"] += 1
+            continue
+
+        stats["reads"] += 1
+        stats["read_latencies"].append(time.perf_counter() - started_at)
+
+
+def _p99(latencies: list[float]) -> float:
+    if not latencies:
+        return 0.0
+
+    return sorted(latencies)[int(len(latencies) * 0.99)] * 1000
+
+
+async def run(
+    mode: str,
+    writers: int,
+    readers: int,
+    duration: float,
+    directory: Path | None = None,
+) -> dict:
+    with tempfile.TemporaryDirectory(dir=directory) as directory:
+        url = f"sqlite+aiosqlite:///{Path(directory) / 'benchmark.sqlite'}"
+
+        if mode == "tuned":
+            reader_engine = create_engine(url, pool_size=readers)
+            writer_engine = create_engine(url, pool_size=1, max_overflow=0)
+        else:
+            reader_engine = writer_engine = create_async_engine(
+                url,
+                pool_size=writers + readers,
+            )
+
+        async with writer_engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            await connection.execute(
+                insert(Post),
+                [
+                    {"title": "Seed", "slug": f"seed-{i}", "content": ""}
+                    for i in range(SEED_POSTS)
+                ],
+            )
+
+        stats = {
+            "writes": 0,
+            "write_errors": 0,
+            "write_latencies": [],
+            "reads": 0,
+            "read_errors": 0,
+            "read_latencies": [],
+        }
+        deadline = time.perf_counter() + duration
+
+        await asyncio.gather(
+            *(_writer(writer_engine, deadline, stats) for _ in range(writers)),
+            *(_reader(reader_engine, deadline, stats) for _ in range(readers)),
+        )
+
+        await reader_engine.dispose()
+        await writer_engine.dispose()
+
+    return {
+        "mode": mode,
+        "writes_per_second": round(stats["writes"] / duration, 1),
+        "write_errors": stats["write_errors"],
+        "write_p99_ms": round(_p99(stats["write_latencies"]), 2),
+        "reads_per_second": round(stats["reads"] / duration, 1),
+        "read_errors": stats["read_errors"],
+        "read_p99_ms": round(_p99(stats["read_latencies"]), 2),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    results = [
+        await run(
+            mode,
+            args.writers,
+            args.readers,
+            args.duration,
+            args.directory,
+        )
+        for mode in ("default", "tuned")
+    ]
+
+    print(json.dumps(results, indent=2))
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        default=None,
+        help="Where to create the database, system temp directory by default",
+    )
+
+    asyncio.run(main(parser.parse_args()))
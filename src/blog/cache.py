@@ -0,0 +1,47 @@
+from sqlalchemy import inspect
+
+from blog.models import Category, Post
+
+
+# Every cached response is labeled with tags of the rows it shows,
+# and services invalidate exactly the tags of the rows they change
+
+
+CATEGORIES_TAG = "categories"
+
+
+def category_tag(slug: str) -> str:
+    """
+    Responses showing the category itself, e.g. its name
+    """
+    return f"category:{slug}"
+
+
+def category_posts_tag(slug: str) -> str:
+    """
+    Responses listing posts of the category
+    """
+    return f"category:{slug}:posts"
+
+
+def post_tag(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def post_tags(post: Post) -> list[str]:
+    # Sparse listings may not load categories, then they are not shown
+    if "categories" in inspect(post).unloaded:
+        return [post_tag(post.id)]
+
+    return [
+        post_tag(post.id),
+        *(category_tag(category.slug) for category in post.categories),
+    ]
+
+
+def category_tags(category: Category) -> list[str]:
+    return [
+        CATEGORIES_TAG,
+        category_tag(category.slug),
+        category_posts_tag(category.slug),
+    ]
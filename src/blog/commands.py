@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+
+from blog import services
+from core.database import session_maker
+
+
+RENDER_CHUNK_SIZE: int = 500
+
+
+async def rebuild_search_index() -> None:
+    async with session_maker() as session:
+        await services.rebuild_search_index(session)
+
+
+async def reconcile_post_counters() -> None:
+    async with session_maker() as session:
+        fixed = await services.reconcile_post_counters(session)
+
+    print(f"Fixed post counters of {fixed} categories and users")
+
+
+async def render_posts() -> None:
+    async with session_maker() as session:
+        rendered = await services.render_posts(session, RENDER_CHUNK_SIZE)
+
+    print(f"Rendered {rendered} posts")
+
+
+COMMANDS = {
+    "rebuild_search_index": rebuild_search_index,
+    "reconcile_post_counters": reconcile_post_counters,
+    "render_posts": render_posts,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blog maintenance commands")
+    parser.add_argument("command", choices=COMMANDS)
+    args = parser.parse_args()
+
+    asyncio.run(COMMANDS[args.command]())
@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import html
+import math
+from dataclasses import dataclass
+
+import bleach
+import markdown
+
+from core.config import settings
+from core.executors import BoundedExecutor
+from core.metrics import timed
+
+
+AVAILABLE_TAGS = [
+    "p",
+    "br",
+    "strong",
+    "em",
+    "ul",
+    "ol",
+    "li",
+    "a",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "blockquote",
+    "code",
+    "pre",
+]
+
+AVAILABLE_ATTRIBUTES = [
+    "href",
+    "title",
+    "alt",
+]
+
+EXCERPT_LENGTH: int = 300
+WORDS_PER_MINUTE: int = 200
+
+MARKDOWN_EXTENSIONS = ["fenced_code"]
+
+sanitize_executor = BoundedExecutor(
+    settings.SANITIZE_WORKERS,
+    name="sanitize",
+    processes=True,
+)
+
+
+def sanitize_content(value: str) -> str:
+    # NOTE bleach is deprecated since 2023
+    return bleach.clean(
+        value,
+        tags=AVAILABLE_TAGS,
+        attributes=AVAILABLE_ATTRIBUTES,
+    )
+
+
+@dataclass(frozen=True)
+class RenderedContent:
+    html: str
+    # Plain text without markup, indexed for search
+    text: str
+    excerpt: str
+    word_count: int
+    reading_time: int
+
+
+def make_excerpt(text: str, length: int = EXCERPT_LENGTH) -> str:
+    """
+    Cut plain text to `length` characters on a word boundary
+    """
+    if len(text) <= length:
+        return text
+
+    return text[:length].rsplit(maxsplit=1)[0] + "…"
+
+
+def render_markdown(source: str) -> RenderedContent:
+    """
+    Render Markdown to sanitized HTML along with its plain-text summary.
+    Raw HTML inside Markdown is kept, so sanitizing must go after rendering
+    """
+    rendered = sanitize_content(
+        markdown.markdown(source, extensions=MARKDOWN_EXTENSIONS)
+    )
+    text = " ".join(
+        html.unescape(bleach.clean(rendered, tags=[], strip=True)).split()
+    )
+    word_count = len(text.split())
+
+    return RenderedContent(
+        html=rendered,
+        text=text,
+        excerpt=make_excerpt(text),
+        word_count=word_count,
+        reading_time=math.ceil(word_count / WORDS_PER_MINUTE),
+    )
+
+
+def hash_content(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+async def render_content(source: str) -> RenderedContent:
+    """
+    Render raw content. Small documents are cheaper to render in place
+    than to send to a worker process, large ones would block the event loop
+    """
+    with timed("render"):
+        if len(source) < settings.SANITIZE_PROCESS_THRESHOLD:
+            return render_markdown(source)
+
+        return await sanitize_executor.run(render_markdown, source)
+
+
+async def render_many(sources: list[str]) -> list[RenderedContent]:
+    return await asyncio.gather(*(render_content(source) for source in sources))
@@ -1,16 +1,17 @@
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, Path, status
+from fastapi import Depends, HTTPException, Path, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from blog import services
 from blog.models import Category, Post
-from core.database import get_scoped_session
+from core.database import get_session
+from utils import decode_cursor
 
 
 async def get_post_by_id(
     post_id: Annotated[int, Path],
-    session: AsyncSession = Depends(get_scoped_session),
+    session: AsyncSession = Depends(get_session),
 ) -> Post:
     post = await services.get_post_by_id(session, post_id)
 
@@ -23,7 +24,7 @@ async def get_post_by_id(
 
 async def get_category_by_slug(
     category_slug: Annotated[str, Path],
-    session: AsyncSession = Depends(get_scoped_session),
+    session: AsyncSession = Depends(get_session),
 ) -> Category:
     category = await services.get_category_by_slug(session, category_slug)
 
@@ -32,3 +33,48 @@ async def get_category_by_slug(
         raise HTTPException(status.HTTP_404_NOT_FOUND, details)
 
     return category
+
+
+async def get_cursor(
+    cursor: Annotated[str | None, Query()] = None,
+) -> int | None:
+    if cursor is None:
+        return None
+
+    try:
+        return decode_cursor(cursor)
+    except ValueError as exc:
+        details = f"Invalid pagination cursor '{cursor}'"
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, details) from exc
+
+
+async def get_post_fields(
+    fields: Annotated[
+        str | None,
+        Query(
+            description=(
+                "Comma-separated fields of listed posts, e.g. `title,slug`. "
+                f"Available: {', '.join(services.POST_FIELDS)}"
+            )
+        ),
+    ] = None,
+) -> tuple[str, ...]:
+    """
+    Fields requested for listed posts in their canonical order.
+    ID is always included, it is needed for pagination
+    """
+    if fields is None:
+        return services.SUMMARY_FIELDS
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(services.POST_FIELDS)
+
+    if unknown:
+        details = f"Unknown post fields {sorted(unknown)}"
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, details)
+
+    return tuple(
+        field
+        for field in services.POST_FIELDS
+        if field in requested or field == "id"
+    )
@@ -1,5 +1,18 @@
-import bleach
-from sqlalchemy import Column, ForeignKey, Integer, String, Table
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    column,
+    event,
+    table,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from auth.models import User
@@ -7,31 +20,6 @@ from core.database import Base, Model
 from utils import slugify
 
 
-AVAILABLE_TAGS = [
-    "p",
-    "br",
-    "strong",
-    "em",
-    "ul",
-    "ol",
-    "li",
-    "a",
-    "h1",
-    "h2",
-    "h3",
-    "h4",
-    "blockquote",
-    "code",
-    "pre",
-]
-
-AVAILABLE_ATTRIBUTES = [
-    "href",
-    "title",
-    "alt",
-]
-
-
 post_category = Table(
     "post_category",
     Model.metadata,
@@ -47,6 +35,13 @@ post_category = Table(
         ForeignKey("categories.slug"),
         primary_key=True,
     ),
+    # The primary key leads on `post_id`, listings of a category need
+    # an index leading on its slug. It covers them, ordered by post ID
+    Index(
+        "ix_post_category_category_slug_post_id",
+        "category_slug",
+        "post_id",
+    ),
 )
 
 
@@ -65,6 +60,18 @@ class Category(Base):
         secondary=post_category,
         back_populates="categories",
     )
+    # Maintained by blog services together with posts of the category,
+    # so listings show them without counting `post_category` rows
+    post_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    last_post_id: Mapped[int | None]
+    last_post_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
+
+    # Incremented on every update, used to build HTTP ETags
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
 
     def __repr__(self) -> str:
         return f"<Category({self.slug=}, {self.name=})>"
@@ -88,12 +95,36 @@ class Post(Model):
         unique=True,
         nullable=False,
     )
+    # Sanitized HTML served to clients, rendered once on write
     content: Mapped[str]
+    # Markdown as sent by the author and its hash, used to skip rendering
+    # when an update does not change the content
+    raw_content: Mapped[str | None]
+    content_hash: Mapped[str | None] = mapped_column(String(64))
+    # Text of `content` without markup, indexed for full-text search,
+    # and its summary for listings. Both are computed with `content`
+    plain_text: Mapped[str] = mapped_column(default="", server_default="")
+    excerpt: Mapped[str] = mapped_column(default="", server_default="")
+    word_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    reading_time: Mapped[int] = mapped_column(default=0, server_default="0")
     categories: Mapped[list[Category]] = relationship(
         "Category",
         secondary=post_category,
         back_populates="posts",
     )
+    # Unknown for posts created before it was tracked
+    created_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+    )
+    # Incremented on every update, used to build HTTP ETags
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
+
+    __table_args__ = (
+        # Posts of an author ordered by ID, e.g. the newest one
+        Index("ix_posts_author_id_id", "author_id", "id"),
+    )
+    __mapper_args__ = {"version_id_col": version}
 
     def __repr__(self) -> str:
         return f"<Post({self.id=}, {self.title=}, {self.slug=})>"
@@ -101,11 +132,62 @@ class Post(Model):
     def __str__(self) -> str:
         return self.title
 
-    @validates("content")
-    def validate_content(self, key: str, value: str) -> str:
-        # NOTE bleach is deprecated since 2023
-        return bleach.clean(
-            value,
-            tags=AVAILABLE_TAGS,
-            attributes=AVAILABLE_ATTRIBUTES,
-        )
+
+# SQLite full-text index over titles and plain text of posts.
+# It is an external content FTS5 table: it stores only the index
+# and reads rows from `posts` itself. Triggers keep it in sync with every
+# insert, update of indexed columns and delete, including bulk statements
+# that bypass the ORM
+POSTS_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, plain_text, content='posts', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts
+    BEGIN
+        INSERT INTO posts_fts(rowid, title, plain_text)
+        VALUES (new.id, new.title, new.plain_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts
+    BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, plain_text)
+        VALUES ('delete', old.id, old.title, old.plain_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_update
+    AFTER UPDATE OF title, plain_text ON posts
+    BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, plain_text)
+        VALUES ('delete', old.id, old.title, old.plain_text);
+        INSERT INTO posts_fts(rowid, title, plain_text)
+        VALUES (new.id, new.title, new.plain_text);
+    END
+    """,
+)
+
+# Drops the index, so it can be created again by `POSTS_FTS_DDL`
+POSTS_FTS_DROP_DDL = (
+    "DROP TRIGGER IF EXISTS posts_fts_update",
+    "DROP TRIGGER IF EXISTS posts_fts_delete",
+    "DROP TRIGGER IF EXISTS posts_fts_insert",
+    "DROP TABLE IF EXISTS posts_fts",
+)
+
+posts_fts = table(
+    "posts_fts",
+    column("rowid", Integer),
+    column("title", String),
+    column("plain_text", String),
+)
+
+for statement in POSTS_FTS_DDL:
+    event.listen(
+        Post.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, EmailStr
 
 
@@ -6,6 +8,16 @@ class Category(BaseModel):
     slug: str
 
 
+class CategoryDetail(Category):
+    """
+    Category with statistics of its posts
+    """
+
+    post_count: int
+    last_post_id: int | None
+    last_post_at: datetime | None
+
+
 class CategoryCreate(Category): ...
 
 
@@ -34,6 +46,42 @@ class PostDelete(BaseModel):
 class Post(BasePost, PostDelete):
     author: EmailStr
     categories: list[Category]
+    word_count: int
+    reading_time: int
+
+
+class PostExport(Post):
+    """
+    Post in a backup export. `content` is the rendered HTML and
+    `raw_content` its Markdown source, absent for posts saved before Markdown
+    """
+
+    raw_content: str | None
+
+
+class PostSummary(PostDelete):
+    """
+    Post without its body, used in listings
+    """
+
+    title: str
+    slug: str
+    excerpt: str
+    word_count: int
+    reading_time: int
+    author: EmailStr
+    categories: list[Category]
+
+
+class PostImportResult(BaseModel):
+    index: int
+    id: int | None = None
+    error: str | None = None
+
+
+class PostPage(BaseModel):
+    items: list[PostSummary]
+    next_cursor: str | None
 
 
 class PostUpdate(BaseModel):
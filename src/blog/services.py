@@ -1,16 +1,249 @@
-from sqlalchemy import Result, select
+from datetime import datetime, timezone
+from typing import AsyncGenerator, Iterable, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    Column,
+    Integer,
+    Result,
+    Select,
+    Table,
+    bindparam,
+    case,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, selectinload
 
 from auth.models import User
-from blog.models import Category, Post
+from blog.cache import (
+    CATEGORIES_TAG,
+    category_posts_tag,
+    category_tags,
+    post_tag,
+)
+from blog.content import (
+    RenderedContent,
+    hash_content,
+    render_content,
+    render_many,
+)
+from blog.models import (
+    POSTS_FTS_DDL,
+    POSTS_FTS_DROP_DDL,
+    Category,
+    Post,
+    post_category,
+    posts_fts,
+)
 from blog.schemas import (
     CategoryCreate,
     CategoryUpdate,
     CategoryUpdatePartial,
     PostCreate,
+    PostImportResult,
     PostUpdate,
     PostUpdatePartial,
 )
+from core.cache import response_cache
+
+
+# Loader options shared by every query returning posts to the API layer.
+# Author is a many-to-one, so it is joined into the main statement;
+# categories are a collection and are fetched by a single `IN` query.
+# Listing N posts therefore costs two queries instead of 2N + 1.
+POST_RELATIONS = (
+    joinedload(Post.author),
+    selectinload(Post.categories),
+)
+
+# Fields of a post that listings can be narrowed to with `?fields=`.
+# Only columns and relationships of requested fields are loaded
+POST_COLUMNS = {
+    "title": Post.title,
+    "slug": Post.slug,
+    "content": Post.content,
+    "excerpt": Post.excerpt,
+    "word_count": Post.word_count,
+    "reading_time": Post.reading_time,
+}
+POST_FIELDS = ("id", *POST_COLUMNS, "author", "categories")
+SUMMARY_FIELDS = tuple(field for field in POST_FIELDS if field != "content")
+
+
+def _post_projection(fields: Iterable[str] | None) -> list:
+    """
+    Loader options that load only `fields` of posts, all of them by default
+    """
+    if fields is None:
+        return list(POST_RELATIONS)
+
+    fields = set(fields)
+    options: list = [
+        load_only(
+            Post.version,
+            Post.author_id,
+            *(column for key, column in POST_COLUMNS.items() if key in fields),
+        )
+    ]
+
+    if "author" in fields:
+        options.append(joinedload(Post.author))
+
+    if "categories" in fields:
+        options.append(selectinload(Post.categories))
+
+    return options
+
+
+async def _commit_versioned(session: AsyncSession) -> None:
+    """
+    Commit changes of versioned rows. If a row was changed
+    by a concurrent request since it was loaded, raise 409
+    """
+    try:
+        await session.commit()
+    except StaleDataError as exc:
+        await session.rollback()
+
+        detail = "Resource was modified by another request, please retry"
+        raise HTTPException(status.HTTP_409_CONFLICT, detail) from exc
+
+
+# Post counters of categories and users are denormalized: services update
+# them in the same transaction as posts, `reconcile_post_counters` repairs
+# any drift. Updates are SQL expressions over current values,
+# so concurrent writers never overwrite each other's increments
+CATEGORY_COUNTERS = (Category.__table__, Category.__table__.c.slug)
+AUTHOR_COUNTERS = (User.__table__, User.__table__.c.id)
+
+
+async def _count_added_posts(
+    session: AsyncSession,
+    table: Table,
+    key: Column,
+    added: dict,
+) -> None:
+    """
+    Add posts to counters of rows of `table`. `added` maps keys of rows
+    to a number of added posts and ID and creation time of the newest one
+    """
+    if not added:
+        return
+
+    last_id = bindparam("b_last_id", type_=Integer)
+    last_at = bindparam("b_last_at", type_=table.c.last_post_at.type)
+    is_newer = or_(
+        table.c.last_post_id.is_(None),
+        table.c.last_post_id < last_id,
+    )
+    statement = (
+        update(table)
+        .where(key == bindparam("b_key"))
+        .values(
+            post_count=table.c.post_count + bindparam("b_count"),
+            last_post_id=case((is_newer, last_id), else_=table.c.last_post_id),
+            last_post_at=case((is_newer, last_at), else_=table.c.last_post_at),
+        )
+    )
+    params = [
+        {"b_key": row_key, "b_count": count, "b_last_id": id, "b_last_at": at}
+        for row_key, (count, id, at) in added.items()
+    ]
+
+    await session.execute(statement, params)
+
+
+def _post_id_of(table: Table) -> Column:
+    """
+    Column of post IDs to order posts of a row of `table` by,
+    so the order is served by the same index as the filter
+    """
+    if table is Category.__table__:
+        return post_category.c.post_id
+
+    return Post.id
+
+
+def _posts_of(table: Table, key: Column, *columns) -> Select:
+    """
+    Select `columns` of posts of a row of `table`,
+    correlated to the statement updating the row
+    """
+    if table is Category.__table__:
+        return (
+            select(*columns)
+            .select_from(Post)
+            .join(post_category, post_category.c.post_id == Post.id)
+            .where(post_category.c.category_slug == key)
+        )
+
+    return select(*columns).select_from(Post).where(Post.author_id == key)
+
+
+def _last_post(
+    table: Table,
+    key: Column,
+    column: Column,
+    except_id: int | None = None,
+):
+    """
+    `column` of the newest post of a row of `table`, except `except_id`
+    """
+    statement = _posts_of(table, key, column)
+    post_id = _post_id_of(table)
+
+    if except_id is not None:
+        statement = statement.where(post_id != except_id)
+
+    return statement.order_by(post_id.desc()).limit(1).scalar_subquery()
+
+
+async def _count_removed_post(
+    session: AsyncSession,
+    table: Table,
+    key: Column,
+    keys: Iterable,
+    post_id: int,
+) -> None:
+    """
+    Remove a post from counters of rows of `table` with `keys`.
+    If it was the newest post of a row, the next newest one takes its place
+    """
+    keys = list(keys)
+
+    if not keys:
+        return
+
+    was_last = table.c.last_post_id == post_id
+    statement = (
+        update(table)
+        .where(key.in_(keys))
+        .values(
+            post_count=table.c.post_count - 1,
+            last_post_id=case(
+                (was_last, _last_post(table, key, Post.id, post_id)),
+                else_=table.c.last_post_id,
+            ),
+            last_post_at=case(
+                (
+                    was_last,
+                    _last_post(table, key, Post.created_at, post_id),
+                ),
+                else_=table.c.last_post_at,
+            ),
+        )
+    )
+
+    await session.execute(statement)
 
 
 async def create_category(
@@ -23,34 +256,117 @@ async def create_category(
     await session.commit()
     await session.refresh(category)
 
+    await response_cache.invalidate(*category_tags(category))
+
     return category
 
 
+def _rendered_fields(rendered: RenderedContent) -> dict:
+    return {
+        "content": rendered.html,
+        "plain_text": rendered.text,
+        "excerpt": rendered.excerpt,
+        "word_count": rendered.word_count,
+        "reading_time": rendered.reading_time,
+    }
+
+
+async def _set_post_content(post: Post, content: str) -> None:
+    """
+    Store Markdown source of a post with its rendered HTML and summary.
+    Rendering is skipped when the source is the same as stored one
+    """
+    content_hash = hash_content(content)
+
+    if post.content_hash == content_hash:
+        return
+
+    for key, value in _rendered_fields(await render_content(content)).items():
+        setattr(post, key, value)
+
+    post.raw_content = content
+    post.content_hash = content_hash
+
+
 async def create_post(
     session: AsyncSession,
     author: User,
     data: PostCreate,
 ) -> Post:
     data_as_dict = data.model_dump()
-    categories = await get_categories_from_slug(session, data_as_dict)
+    categories = await get_categories_from_slug(
+        session,
+        data_as_dict.pop("categories"),
+    )
+
+    content = data_as_dict.pop("content")
 
     post = Post(**data_as_dict, author=author, categories=categories)
+    await _set_post_content(post, content)
 
     session.add(post)
-    await session.commit()
+
+    try:
+        await session.flush()
+
+        newest = (1, post.id, post.created_at)
+        await _count_added_posts(
+            session,
+            *CATEGORY_COUNTERS,
+            {category.slug: newest for category in categories},
+        )
+        await _count_added_posts(
+            session,
+            *AUTHOR_COUNTERS,
+            {author.id: newest},
+        )
+
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+
+        detail = f"Post with slug '{data.slug}' already exists"
+        raise HTTPException(status.HTTP_409_CONFLICT, detail) from exc
     await session.refresh(post)
 
+    await response_cache.invalidate(
+        CATEGORIES_TAG,
+        *(category_posts_tag(category.slug) for category in categories),
+    )
+
     return post
 
 
 async def delete_category(session: AsyncSession, category: Category) -> None:
+    tags = category_tags(category)
+
     await session.delete(category)
-    await session.commit()
+    await _commit_versioned(session)
+
+    await response_cache.invalidate(*tags)
 
 
 async def delete_post(session: AsyncSession, post: Post) -> None:
+    slugs = [
+        category.slug for category in await post.awaitable_attrs.categories
+    ]
+    tags = [
+        CATEGORIES_TAG,
+        post_tag(post.id),
+        *(category_posts_tag(slug) for slug in slugs),
+    ]
+
+    await _count_removed_post(session, *CATEGORY_COUNTERS, slugs, post.id)
+    await _count_removed_post(
+        session,
+        *AUTHOR_COUNTERS,
+        [post.author_id],
+        post.id,
+    )
     await session.delete(post)
-    await session.commit()
+    await _commit_versioned(session)
+
+    await response_cache.invalidate(*tags)
 
 
 async def get_all_categories(session: AsyncSession) -> list[Category]:
@@ -61,12 +377,38 @@ async def get_all_categories(session: AsyncSession) -> list[Category]:
     return list(categories)
 
 
-async def get_all_posts(session: AsyncSession) -> list[Post]:
-    statement = select(Post).order_by(Post.id)
+def _paginate(
+    statement: Select,
+    after_id: int | None,
+    limit: int | None,
+) -> Select:
+    """
+    Apply keyset pagination by `Post.id`: page cost does not depend
+    on how deep the page is, unlike `OFFSET`
+    """
+    if after_id is not None:
+        statement = statement.where(Post.id > after_id)
+
+    if limit is not None:
+        statement = statement.limit(limit)
+
+    return statement
+
+
+async def get_all_posts(
+    session: AsyncSession,
+    after_id: int | None = None,
+    limit: int | None = None,
+    fields: Iterable[str] | None = None,
+) -> list[Post]:
+    statement = (
+        select(Post).options(*_post_projection(fields)).order_by(Post.id)
+    )
+    statement = _paginate(statement, after_id, limit)
     result: Result = await session.execute(statement)
-    products = result.scalars().all()
+    posts = result.scalars().all()
 
-    return list(products)
+    return list(posts)
 
 
 async def get_category_by_slug(
@@ -79,37 +421,42 @@ async def get_category_by_slug(
 async def get_categories_from_slug(
     session: AsyncSession, slugs: list[str]
 ) -> list[Category]:
-    categories: list[Category] = []
-
-    for slug in slugs:
-        category = await get_category_by_slug(session, slug)
-
-        if category is None:
-            # NOTE rasing exception is better approach.
-            # Rewrite later
-            continue
+    """
+    Resolve categories in the order of `slugs` with a single query.
+    Raise 404 listing every unknown slug at once
+    """
+    categories = await resolve_categories(session, slugs)
+    unique_slugs = list(dict.fromkeys(slugs))
+    missing = [slug for slug in unique_slugs if slug not in categories]
 
-        categories.append(category)
+    if missing:
+        detail = f"Categories with slugs {missing} are not found"
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail)
 
-    return categories
+    return [categories[slug] for slug in unique_slugs]
 
 
 async def get_post_by_id(session: AsyncSession, id: int) -> Post | None:
-    return await session.get(Post, id)
+    return await session.get(Post, id, options=POST_RELATIONS)
 
 
 async def get_posts_by_category(
     session: AsyncSession,
     category_slug: str,
+    after_id: int | None = None,
+    limit: int | None = None,
+    fields: Iterable[str] | None = None,
 ) -> list[Post]:
-    category = await get_category_by_slug(session, category_slug)
+    # Filtering by the link table alone lets the index on
+    # `(category_slug, post_id)` serve both the filter and the order
     statement = (
         select(Post)
-        .join(Post.categories)
-        .where(Post.categories.contains(category))
-        .order_by(Post.id)
-        .distinct()
+        .join(post_category, post_category.c.post_id == Post.id)
+        .where(post_category.c.category_slug == category_slug)
+        .options(*_post_projection(fields))
+        .order_by(post_category.c.post_id)
     )
+    statement = _paginate(statement, after_id, limit)
     posts = (await session.execute(statement)).scalars().all()
 
     return list(posts)
@@ -119,11 +466,340 @@ async def get_post_by_slug(
     session: AsyncSession,
     slug: str,
 ) -> Post | None:
-    statement = select(Post).filter(Post.slug == slug)
+    statement = (
+        select(Post).filter(Post.slug == slug).options(*POST_RELATIONS)
+    )
+    result: Result = await session.execute(statement)
+    post = result.scalars().first()
+
+    return post
+
+
+async def import_posts(
+    session: AsyncSession,
+    author: User,
+    items: Sequence[PostCreate],
+    chunk_size: int,
+) -> list[PostImportResult]:
+    """
+    Insert many posts at once. Every chunk of `chunk_size` items costs
+    a constant number of executemany-style statements and one transaction.
+    Invalid items are reported in the result and do not stop the import
+    """
+    author_id = author.id
+    seen_slugs: set[str] = set()
+    results: list[PostImportResult] = []
+
+    for start in range(0, len(items), chunk_size):
+        results.extend(
+            await _import_posts_chunk(
+                session,
+                author_id,
+                items[start : start + chunk_size],
+                start,
+                seen_slugs,
+            )
+        )
+
+    await response_cache.invalidate(
+        CATEGORIES_TAG,
+        *{
+            category_posts_tag(slug)
+            for item, result in zip(items, results)
+            if result.id is not None
+            for slug in item.categories
+        }
+    )
+
+    return results
+
+
+async def _count_imported_posts(
+    session: AsyncSession,
+    author_id: int,
+    post_ids: list[int],
+    links: list[dict],
+    created_at: datetime,
+) -> None:
+    """
+    Add a chunk of imported posts and their category `links`
+    to post counters with one statement per counted table
+    """
+    added: dict[str, tuple[int, int, datetime]] = {}
+
+    for link in links:
+        count, last_id, _ = added.get(link["category_slug"], (0, 0, None))
+        added[link["category_slug"]] = (
+            count + 1,
+            max(last_id, link["post_id"]),
+            created_at,
+        )
+
+    await _count_added_posts(session, *CATEGORY_COUNTERS, added)
+    await _count_added_posts(
+        session,
+        *AUTHOR_COUNTERS,
+        {author_id: (len(post_ids), max(post_ids), created_at)},
+    )
+
+
+async def _import_posts_chunk(
+    session: AsyncSession,
+    author_id: int,
+    chunk: Sequence[PostCreate],
+    start: int,
+    seen_slugs: set[str],
+) -> list[PostImportResult]:
+    categories = await resolve_categories(
+        session,
+        (slug for item in chunk for slug in item.categories),
+    )
+    statement = select(Post.slug).where(
+        Post.slug.in_([item.slug for item in chunk])
+    )
+    existing_slugs = set((await session.execute(statement)).scalars())
+
+    results: list[PostImportResult] = []
+    pending: list[tuple[PostImportResult, list[str]]] = []
+    rows: list[dict] = []
+    # Slugs of this chunk are remembered as imported only once it commits,
+    # a rolled back chunk must not reject them in later chunks
+    chunk_slugs: set[str] = set()
+    created_at = datetime.now(timezone.utc)
+
+    for offset, item in enumerate(chunk):
+        result = PostImportResult(index=start + offset)
+        slugs = list(dict.fromkeys(item.categories))
+        missing = [slug for slug in slugs if slug not in categories]
+
+        if missing:
+            result.error = f"Categories with slugs {missing} are not found"
+        elif any(
+            item.slug in slugs
+            for slugs in (existing_slugs, seen_slugs, chunk_slugs)
+        ):
+            result.error = f"Post with slug '{item.slug}' already exists"
+        else:
+            chunk_slugs.add(item.slug)
+            pending.append((result, slugs))
+            rows.append(
+                {
+                    "author_id": author_id,
+                    "title": item.title,
+                    "slug": item.slug,
+                    "raw_content": item.content,
+                    "content_hash": hash_content(item.content),
+                    "created_at": created_at,
+                }
+            )
+
+        results.append(result)
+
+    if not rows:
+        return results
+
+    rendered = await render_many([row["raw_content"] for row in rows])
+
+    for row, content in zip(rows, rendered):
+        row.update(_rendered_fields(content))
+
+    try:
+        await session.execute(insert(Post), rows)
+
+        # Slugs are unique, so they map inserted rows back to their IDs
+        # without relying on backend support of executemany RETURNING
+        statement = select(Post.slug, Post.id).where(
+            Post.slug.in_([row["slug"] for row in rows])
+        )
+        ids: dict[str, int] = dict((await session.execute(statement)).all())
+        links = [
+            {"post_id": ids[row["slug"]], "category_slug": slug}
+            for row, (_, slugs) in zip(rows, pending)
+            for slug in slugs
+        ]
+
+        if links:
+            await session.execute(insert(post_category), links)
+
+        await _count_imported_posts(
+            session,
+            author_id,
+            list(ids.values()),
+            links,
+            created_at,
+        )
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+
+        for result, _ in pending:
+            result.error = f"Chunk is rolled back: {exc.orig}"
+    else:
+        seen_slugs.update(chunk_slugs)
+
+        for row, (result, _) in zip(rows, pending):
+            result.id = ids[row["slug"]]
+
+    return results
+
+
+async def resolve_categories(
+    session: AsyncSession,
+    slugs: Iterable[str],
+) -> dict[str, Category]:
+    """
+    Load categories for all `slugs` with one `IN` query.
+    Unknown slugs are absent from the result
+    """
+    unique_slugs = set(slugs)
+
+    if not unique_slugs:
+        return {}
+
+    statement = select(Category).where(Category.slug.in_(unique_slugs))
     result: Result = await session.execute(statement)
-    user = result.scalars().first()
 
-    return user
+    return {category.slug: category for category in result.scalars()}
+
+
+def _fts_query(query: str) -> str:
+    """
+    Quote every word, so user input is never parsed as FTS5 query syntax
+    """
+    words = (word.replace('"', '""') for word in query.split())
+    return " ".join(f'"{word}"' for word in words)
+
+
+async def rebuild_search_index(session: AsyncSession) -> None:
+    """
+    Create full-text index from scratch, replacing an outdated one,
+    and backfill it from existing posts. Only SQLite keeps a separate index
+    """
+    if session.get_bind().dialect.name != "sqlite":
+        return
+
+    for statement in (*POSTS_FTS_DROP_DDL, *POSTS_FTS_DDL):
+        await session.execute(text(statement))
+
+    await session.execute(
+        text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+    )
+    await session.commit()
+
+
+async def reconcile_post_counters(session: AsyncSession) -> int:
+    """
+    Recount post counters of all categories and users from their posts
+    and fix the ones that drifted. Return number of fixed rows
+    """
+    fixed = 0
+
+    for table, key in (CATEGORY_COUNTERS, AUTHOR_COUNTERS):
+        post_count = _posts_of(table, key, func.count()).scalar_subquery()
+        last_post_id = _last_post(table, key, Post.id)
+        last_post_at = _last_post(table, key, Post.created_at)
+        statement = (
+            update(table)
+            .where(
+                or_(
+                    table.c.post_count != post_count,
+                    table.c.last_post_id.is_distinct_from(last_post_id),
+                    table.c.last_post_at.is_distinct_from(last_post_at),
+                )
+            )
+            .values(
+                post_count=post_count,
+                last_post_id=last_post_id,
+                last_post_at=last_post_at,
+            )
+        )
+        fixed += (await session.execute(statement)).rowcount
+
+    await session.commit()
+
+    if fixed:
+        await response_cache.invalidate(CATEGORIES_TAG)
+
+    return fixed
+
+
+async def render_posts(session: AsyncSession, chunk_size: int) -> int:
+    """
+    Render posts saved before Markdown rendering or summaries, posts
+    without Markdown source are rendered from their stored HTML.
+    Return number of rendered posts
+    """
+    statement = (
+        select(Post).where(Post.content_hash.is_(None)).limit(chunk_size)
+    )
+    rendered = 0
+
+    while posts := (await session.execute(statement)).scalars().all():
+        for post in posts:
+            await _set_post_content(post, post.raw_content or post.content)
+
+        await session.commit()
+        rendered += len(posts)
+
+    return rendered
+
+
+async def search_posts(
+    session: AsyncSession,
+    query: str,
+    limit: int,
+) -> list[Post]:
+    """
+    Full-text search over post titles and text, best matches first.
+    SQLite uses the FTS5 index ranked by BM25,
+    other backends fall back to case-insensitive substring matching
+    """
+    if not query.split():
+        return []
+
+    if session.get_bind().dialect.name == "sqlite":
+        rank = func.bm25(literal_column("posts_fts"))
+        statement = (
+            select(Post)
+            .join(posts_fts, posts_fts.c.rowid == Post.id)
+            .where(text("posts_fts MATCH :query"))
+            .order_by(rank)
+            .params(query=_fts_query(query))
+        )
+    else:
+        pattern = f"%{query.strip()}%"
+        statement = (
+            select(Post)
+            .where(
+                or_(Post.title.ilike(pattern), Post.plain_text.ilike(pattern))
+            )
+            .order_by(Post.title.ilike(pattern).desc(), Post.id)
+        )
+
+    statement = statement.options(*POST_RELATIONS).limit(limit)
+    result: Result = await session.execute(statement)
+
+    return list(result.scalars().all())
+
+
+async def stream_posts(
+    session: AsyncSession,
+    chunk_size: int,
+) -> AsyncGenerator[list[Post], None]:
+    """
+    Iterate over all posts in chunks of `chunk_size` using a server-side
+    cursor, so only one chunk is held in memory at a time
+    """
+    statement = (
+        select(Post)
+        .options(*POST_RELATIONS)
+        .order_by(Post.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await session.stream_scalars(statement)
+
+    async for posts in result.partitions():
+        yield list(posts)
 
 
 async def update_category(
@@ -132,10 +808,14 @@ async def update_category(
     data: CategoryUpdate | CategoryUpdatePartial,
     partial: bool = False,
 ) -> Category:
+    tags = category_tags(category)
+
     for key, value in data.model_dump(exclude_none=partial).items():
         setattr(category, key, value)
 
-    await session.commit()
+    await _commit_versioned(session)
+
+    await response_cache.invalidate(*tags, *category_tags(category))
 
     return category
 
@@ -147,18 +827,51 @@ async def update_post(
     partial: bool = False,
 ) -> Post:
     data_as_dict = data.model_dump(exclude_none=partial)
+    tags = [post_tag(post.id)]
+    old_slugs: set[str] = set()
+    new_slugs: set[str] = set()
 
     if "categories" in data_as_dict:
-        await post.awaitable_attrs.categories
-
+        old_slugs = {
+            category.slug
+            for category in await post.awaitable_attrs.categories
+        }
         post.categories = await get_categories_from_slug(
             session,
             data_as_dict.pop("categories"),
         )
+        new_slugs = {category.slug for category in post.categories}
+
+        # Membership changes both old and new category listings
+        # and post counters of categories
+        tags.append(CATEGORIES_TAG)
+        tags.extend(category_posts_tag(slug) for slug in old_slugs | new_slugs)
+
+    if "content" in data_as_dict:
+        await _set_post_content(post, data_as_dict.pop("content"))
 
     for key, value in data_as_dict.items():
         setattr(post, key, value)
 
-    await session.commit()
+    # Counters are updated last, as in `create_post`: the first write
+    # takes the writer, which must not wait for rendering above
+    await _count_removed_post(
+        session,
+        *CATEGORY_COUNTERS,
+        old_slugs - new_slugs,
+        post.id,
+    )
+    await _count_added_posts(
+        session,
+        *CATEGORY_COUNTERS,
+        {
+            slug: (1, post.id, post.created_at)
+            for slug in new_slugs - old_slugs
+        },
+    )
+
+    await _commit_versioned(session)
+
+    await response_cache.invalidate(*tags)
 
     return post
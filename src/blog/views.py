@@ -1,91 +1,380 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import time
+from typing import Annotated, Any, AsyncGenerator, Iterable, Sequence
+from urllib.parse import urlencode
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth.dependencies import get_user_by_JWT_token
+from auth.dependencies import (
+    get_token_claims,
+    get_user_by_JWT_token,
+    limit_by_user,
+)
 from auth.models import User
-from auth.services import is_admin_or_raise_401
+from auth.services import TokenClaims, is_admin_or_raise_401
 from blog import dependencies, services
+from blog.cache import CATEGORIES_TAG, category_posts_tag, post_tags
 from blog.models import Category, Post
 from blog.schemas import Category as CategorySchema
-from blog.schemas import CategoryCreate, CategoryUpdate, CategoryUpdatePartial
+from blog.schemas import (
+    CategoryCreate,
+    CategoryDetail,
+    CategoryUpdate,
+    CategoryUpdatePartial,
+)
 from blog.schemas import Post as PostSchema
-from blog.schemas import PostCreate, PostUpdate, PostUpdatePartial
-from core.database import get_scoped_session
+from blog.schemas import (
+    PostCreate,
+    PostExport,
+    PostImportResult,
+    PostPage,
+    PostSummary,
+    PostUpdate,
+    PostUpdatePartial,
+)
+from core.cache import response_cache
+from core.compression import choose_encoding
+from core.database import get_session, replication_lag, session_maker
+from core.http import cache_headers, etag_matches, make_etag, not_modified
+from core.metrics import timed
+from utils import encode_cursor
 
 
 posts_router = APIRouter(prefix="/posts", tags=["Posts"])
 categories_router = APIRouter(prefix="/categories", tags=["Categories"])
 
 DEFAULT_ACCESS_RESTRICTED_MESSAGE: str = "Only author of a post can edit it"
+DEFAULT_PAGE_SIZE: int = 20
+MAX_PAGE_SIZE: int = 100
+EXPORT_CHUNK_SIZE: int = 500
+IMPORT_CHUNK_SIZE: int = 1000
+
+WRITE_RATE_LIMIT = Depends(limit_by_user("write"))
+
+# Responses are serialized here in one pass and returned as `Response`,
+# so FastAPI does not validate them again against the return annotation
+categories_adapter = TypeAdapter(list[CategoryDetail])
+post_summaries_adapter = TypeAdapter(list[PostSummary])
 
 
 def is_author_or_raise_401(
-    user: User,
+    user: User | TokenClaims,
     post: Post,
     detail: str = DEFAULT_ACCESS_RESTRICTED_MESSAGE,
 ) -> None:
-    if post.author != user:
+    if post.author_id != user.id:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail)
 
 
 async def _post_to_schema(post: Post) -> PostSchema:
-    return PostSchema(
-        id=post.id,
-        title=post.title,
-        slug=post.slug,
-        content=post.content,
-        categories=[
-            _category_to_schema(category)
-            for category in await post.awaitable_attrs.categories
-        ],
-        author=(await post.awaitable_attrs.author).email,
+    with timed("serialize"):
+        return PostSchema.model_construct(
+            id=post.id,
+            title=post.title,
+            slug=post.slug,
+            content=post.content,
+            categories=[
+                _category_to_schema(category)
+                for category in await post.awaitable_attrs.categories
+            ],
+            author=(await post.awaitable_attrs.author).email,
+            word_count=post.word_count,
+            reading_time=post.reading_time,
+        )
+
+
+async def _post_to_export(post: Post) -> PostExport:
+    return PostExport.model_construct(
+        **dict(await _post_to_schema(post)),
+        raw_content=post.raw_content,
+    )
+
+
+async def _post_to_summary(post: Post) -> PostSummary:
+    with timed("serialize"):
+        return PostSummary.model_construct(
+            id=post.id,
+            title=post.title,
+            slug=post.slug,
+            excerpt=post.excerpt,
+            word_count=post.word_count,
+            reading_time=post.reading_time,
+            categories=[
+                _category_to_schema(category)
+                for category in await post.awaitable_attrs.categories
+            ],
+            author=(await post.awaitable_attrs.author).email,
+        )
+
+
+def _post_to_fields(post: Post, fields: Sequence[str]) -> dict[str, Any]:
+    """
+    Serialize only `fields` of a post loaded with the same projection
+    """
+    item: dict[str, Any] = {}
+
+    with timed("serialize"):
+        for field in fields:
+            if field == "author":
+                item[field] = post.author.email
+            elif field == "categories":
+                item[field] = [
+                    {"name": category.name, "slug": category.slug}
+                    for category in post.categories
+                ]
+            else:
+                item[field] = getattr(post, field)
+
+    return item
+
+
+def _post_version(post: Post) -> tuple:
+    """
+    Everything the serialized post depends on. Category membership is
+    included because it does not bump the version of the post row
+    """
+    if "categories" in inspect(post).unloaded:
+        return post.id, post.version, post.author_id
+
+    return (
+        post.id,
+        post.version,
+        post.author_id,
+        [(category.slug, category.version) for category in post.categories],
+    )
+
+
+def _split_page(
+    posts: list[Post],
+    limit: int,
+) -> tuple[list[Post], str | None]:
+    """
+    Split `limit + 1` fetched posts into a page and a cursor of the next one:
+    the extra row only tells whether a next page exists
+    """
+    if len(posts) <= limit:
+        return posts, None
+
+    posts = posts[:limit]
+    return posts, encode_cursor(posts[-1].id)
+
+
+def _page_etag(
+    posts: list[Post],
+    next_cursor: str | None,
+    fields: Sequence[str],
+) -> str:
+    return make_etag(
+        fields,
+        next_cursor,
+        [_post_version(post) for post in posts],
+    )
+
+
+def _page_to_json(
+    posts: list[Post],
+    next_cursor: str | None,
+    fields: Sequence[str],
+) -> bytes:
+    return to_json(
+        {
+            "items": [_post_to_fields(post, fields) for post in posts],
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+def _cache_key(request: Request, params: dict[str, Any]) -> str:
+    """
+    Key of a response by its path and parameters parsed by the handler.
+    Other query parameters do not change the response, so they must not
+    spread it over more entries and evict the hot ones
+    """
+    return f"{request.url.path}?{urlencode(sorted(params.items()))}"
+
+
+def _json_response(
+    body: bytes,
+    etag: str | None = None,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    return Response(
+        body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=cache_headers(etag) if etag is not None else None,
+    )
+
+
+async def _get_cached_response(
+    request: Request,
+    **params: Any,
+) -> Response | None:
+    request.state.cache_key = _cache_key(request, params)
+    cached = await response_cache.get(
+        request.state.cache_key,
+        choose_encoding(request.headers.get("accept-encoding")),
+    )
+
+    if cached is None:
+        # Data read after this is at least this fresh, see `_cache_response`
+        request.state.read_at = time.monotonic()
+        return None
+
+    etag, body, encoding = cached
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    response = _json_response(body, etag)
+
+    if encoding is not None:
+        # Compressed when cached, compression middleware passes it through
+        response.headers["Content-Encoding"] = encoding
+
+    return response
+
+
+async def _cache_response(
+    request: Request,
+    session: AsyncSession,
+    etag: str,
+    body: bytes,
+    tags: Iterable[str],
+) -> Response:
+    """
+    Cache the body read with `session` after `_get_cached_response` missed.
+    A replica may miss writes made up to its lag before the read, so the body
+    is not cached if its tags were invalidated since then
+    """
+    await response_cache.set(
+        request.state.cache_key,
+        etag,
+        body,
+        tags,
+        read_at=request.state.read_at - replication_lag(session),
+    )
+    return _json_response(body, etag)
+
+
+async def _export_posts_as_ndjson() -> AsyncGenerator[str, None]:
+    """
+    Serialize all posts as NDJSON chunk by chunk.
+    Response is streamed after the handler returns,
+    so the generator owns its session instead of using a dependency
+    """
+    async with session_maker(info={"read_only": True}) as session:
+        async for posts in services.stream_posts(session, EXPORT_CHUNK_SIZE):
+            yield "".join(
+                [
+                    (await _post_to_export(post)).model_dump_json() + "\n"
+                    for post in posts
+                ]
+            )
+
+
+async def _post_response(
+    post: Post,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    body = (await _post_to_schema(post)).model_dump_json().encode()
+    return _json_response(body, status_code=status_code)
+
+
+def _category_response(
+    category: Category,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    body = _category_to_detail(category).model_dump_json().encode()
+    return _json_response(body, status_code=status_code)
+
+
+def _category_to_detail(category: Category) -> CategoryDetail:
+    return CategoryDetail.model_construct(
+        name=category.name,
+        slug=category.slug,
+        post_count=category.post_count,
+        last_post_id=category.last_post_id,
+        last_post_at=category.last_post_at,
     )
 
 
 def _category_to_schema(category: Category) -> CategorySchema:
-    return CategorySchema(name=category.name, slug=category.slug)
+    return CategorySchema.model_construct(
+        name=category.name,
+        slug=category.slug,
+    )
 
 
-@categories_router.post("/", status_code=status.HTTP_201_CREATED)
+@categories_router.post(
+    "/",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[WRITE_RATE_LIMIT],
+)
 async def create_category(
     data: CategoryCreate,
-    user: User = Depends(get_user_by_JWT_token),
-    session: AsyncSession = Depends(get_scoped_session),
-) -> CategorySchema:
+    user: TokenClaims = Depends(get_token_claims),
+    session: AsyncSession = Depends(get_session),
+) -> CategoryDetail:
     is_admin_or_raise_401(user)
-    return _category_to_schema(await services.create_category(session, data))
+    return _category_response(
+        await services.create_category(session, data),
+        status.HTTP_201_CREATED,
+    )
 
 
-@posts_router.post("/", status_code=status.HTTP_201_CREATED)
+@posts_router.post(
+    "/",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[WRITE_RATE_LIMIT],
+)
 async def create_post(
     data: PostCreate,
     user: User = Depends(get_user_by_JWT_token),
-    session: AsyncSession = Depends(get_scoped_session),
+    session: AsyncSession = Depends(get_session),
 ) -> PostSchema:
     is_admin_or_raise_401(user)
-    return await _post_to_schema(
-        await services.create_post(session, user, data)
+    return await _post_response(
+        await services.create_post(session, user, data),
+        status.HTTP_201_CREATED,
     )
 
 
 @categories_router.delete(
     "/{category_slug}",
     status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[WRITE_RATE_LIMIT],
 )
 async def delete_category(
-    user: User = Depends(get_user_by_JWT_token),
+    user: TokenClaims = Depends(get_token_claims),
     category: Category = Depends(dependencies.get_category_by_slug),
-    session: AsyncSession = Depends(get_scoped_session),
+    session: AsyncSession = Depends(get_session),
 ):
     is_admin_or_raise_401(user)
     await services.delete_category(session, category)
 
 
-@posts_router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
+@posts_router.delete(
+    "/{post_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[WRITE_RATE_LIMIT],
+)
 async def delete_post(
-    user: User = Depends(get_user_by_JWT_token),
+    user: TokenClaims = Depends(get_token_claims),
     post: Post = Depends(dependencies.get_post_by_id),
-    session: AsyncSession = Depends(get_scoped_session),
+    session: AsyncSession = Depends(get_session),
 ):
     is_admin_or_raise_401(user)
     is_author_or_raise_401(user, post)
@@ -93,60 +382,193 @@ async def delete_post(
     await services.delete_post(session, post)
 
 
+@posts_router.get("/export")
+async def export_posts() -> StreamingResponse:
+    return StreamingResponse(
+        _export_posts_as_ndjson(),
+        media_type="application/x-ndjson",
+    )
+
+
 @categories_router.get("/")
 async def get_all_categories(
-    session: AsyncSession = Depends(get_scoped_session),
-) -> list[CategorySchema]:
-    return [
-        _category_to_schema(category)
-        for category in await services.get_all_categories(session)
-    ]
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+) -> list[CategoryDetail]:
+    if (cached := await _get_cached_response(request)) is not None:
+        return cached
+
+    categories = await services.get_all_categories(session)
+    # Post counters are updated without bumping versions of categories
+    etag = make_etag(
+        [
+            (
+                category.slug,
+                category.version,
+                category.post_count,
+                category.last_post_id,
+            )
+            for category in categories
+        ]
+    )
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    body = categories_adapter.dump_json(
+        [_category_to_detail(category) for category in categories]
+    )
+
+    return await _cache_response(
+        request,
+        session,
+        etag,
+        body,
+        [CATEGORIES_TAG],
+    )
 
 
 @posts_router.get("/")
 async def get_all_posts(
-    session: AsyncSession = Depends(get_scoped_session),
-) -> list[PostSchema]:
-    return [
-        await _post_to_schema(post)
-        for post in await services.get_all_posts(session)
-    ]
+    request: Request,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    after_id: int | None = Depends(dependencies.get_cursor),
+    fields: tuple[str, ...] = Depends(dependencies.get_post_fields),
+    session: AsyncSession = Depends(get_session),
+) -> PostPage:
+    posts, next_cursor = _split_page(
+        await services.get_all_posts(session, after_id, limit + 1, fields),
+        limit,
+    )
+    etag = _page_etag(posts, next_cursor, fields)
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    return _json_response(_page_to_json(posts, next_cursor, fields), etag)
 
 
 @posts_router.get("/categories/{category_slug}/posts")
 async def get_posts_by_category_slug(
+    request: Request,
     category_slug: str,
-    session: AsyncSession = Depends(get_scoped_session),
-) -> list[PostSchema]:
-    return [
-        await _post_to_schema(post)
-        for post in await services.get_posts_by_category(session, category_slug)
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    after_id: int | None = Depends(dependencies.get_cursor),
+    fields: tuple[str, ...] = Depends(dependencies.get_post_fields),
+    session: AsyncSession = Depends(get_session),
+) -> PostPage:
+    cached = await _get_cached_response(
+        request,
+        limit=limit,
+        after_id=after_id,
+        fields=",".join(fields),
+    )
+
+    if cached is not None:
+        return cached
+
+    posts, next_cursor = _split_page(
+        await services.get_posts_by_category(
+            session,
+            category_slug,
+            after_id,
+            limit + 1,
+            fields,
+        ),
+        limit,
+    )
+    etag = _page_etag(posts, next_cursor, fields)
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    tags = [
+        category_posts_tag(category_slug),
+        *(tag for post in posts for tag in post_tags(post)),
     ]
 
+    return await _cache_response(
+        request,
+        session,
+        etag,
+        _page_to_json(posts, next_cursor, fields),
+        tags,
+    )
+
+
+@posts_router.get("/search")
+async def search_posts(
+    q: Annotated[str, Query(min_length=1)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    session: AsyncSession = Depends(get_session),
+) -> list[PostSummary]:
+    posts = await services.search_posts(session, q, limit)
+
+    return _json_response(
+        post_summaries_adapter.dump_json(
+            [await _post_to_summary(post) for post in posts]
+        )
+    )
+
 
 @categories_router.get("/{category_slug}")
 async def get_category_by_slug(
     category: Category = Depends(dependencies.get_category_by_slug),
-) -> CategorySchema:
-    return _category_to_schema(category)
+) -> CategoryDetail:
+    return _category_response(category)
 
 
 @posts_router.get("/{post_id}")
 async def get_post_by_id(
-    post: Post = Depends(dependencies.get_post_by_id),
+    request: Request,
+    post_id: int,
+    session: AsyncSession = Depends(get_session),
 ) -> PostSchema:
-    return await _post_to_schema(post)
+    if (cached := await _get_cached_response(request)) is not None:
+        return cached
+
+    post = await dependencies.get_post_by_id(post_id, session)
+    etag = make_etag(_post_version(post))
+
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    body = (await _post_to_schema(post)).model_dump_json().encode()
+
+    return await _cache_response(
+        request,
+        session,
+        etag,
+        body,
+        post_tags(post),
+    )
+
+
+@posts_router.post(
+    "/import",
+    dependencies=[WRITE_RATE_LIMIT],
+)
+async def import_posts(
+    data: list[PostCreate],
+    user: User = Depends(get_user_by_JWT_token),
+    session: AsyncSession = Depends(get_session),
+) -> list[PostImportResult]:
+    is_admin_or_raise_401(user)
+    return await services.import_posts(session, user, data, IMPORT_CHUNK_SIZE)
 
 
-@categories_router.patch("/{category_slug}")
+@categories_router.patch(
+    "/{category_slug}",
+    dependencies=[WRITE_RATE_LIMIT],
+)
 async def partial_update_category(
     data: CategoryUpdatePartial,
-    user: User = Depends(get_user_by_JWT_token),
+    user: TokenClaims = Depends(get_token_claims),
     category: Category = Depends(dependencies.get_category_by_slug),
-    session: AsyncSession = Depends(get_scoped_session),
-) -> CategorySchema:
+    session: AsyncSession = Depends(get_session),
+) -> CategoryDetail:
     is_admin_or_raise_401(user)
-    return _category_to_schema(
+    return _category_response(
         await services.update_category(
             session,
             category,
@@ -156,44 +578,53 @@ async def partial_update_category(
     )
 
 
-@posts_router.patch("/{post_id}")
+@posts_router.patch(
+    "/{post_id}",
+    dependencies=[WRITE_RATE_LIMIT],
+)
 async def partial_update_post(
     data: PostUpdatePartial,
-    user: User = Depends(get_user_by_JWT_token),
+    user: TokenClaims = Depends(get_token_claims),
     post: Post = Depends(dependencies.get_post_by_id),
-    session: AsyncSession = Depends(get_scoped_session),
+    session: AsyncSession = Depends(get_session),
 ):
     is_admin_or_raise_401(user)
     is_author_or_raise_401(user, post)
 
-    return await _post_to_schema(
+    return await _post_response(
         await services.update_post(session, post, data, partial=True)
     )
 
 
-@categories_router.put("/{category_slug}")
+@categories_router.put(
+    "/{category_slug}",
+    dependencies=[WRITE_RATE_LIMIT],
+)
 async def update_category(
     data: CategoryUpdate,
-    user: User = Depends(get_user_by_JWT_token),
+    user: TokenClaims = Depends(get_token_claims),
     category: Category = Depends(dependencies.get_category_by_slug),
-    session: AsyncSession = Depends(get_scoped_session),
+    session: AsyncSession = Depends(get_session),
 ):
     is_admin_or_raise_401(user)
-    return _category_to_schema(
+    return _category_response(
         await services.update_category(session, category, data)
     )
 
 
-@posts_router.put("/{post_id}")
+@posts_router.put(
+    "/{post_id}",
+    dependencies=[WRITE_RATE_LIMIT],
+)
 async def update_post(
     data: PostUpdate,
-    user: User = Depends(get_user_by_JWT_token),
+    user: TokenClaims = Depends(get_token_claims),
     post: Post = Depends(dependencies.get_post_by_id),
-    session: AsyncSession = Depends(get_scoped_session),
+    session: AsyncSession = Depends(get_session),
 ):
     is_admin_or_raise_401(user)
     is_author_or_raise_401(user, post)
 
-    return await _post_to_schema(
+    return await _post_response(
         await services.update_post(session, post, data)
     )
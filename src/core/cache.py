@@ -0,0 +1,269 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Iterable, TypeVar
+
+from core.compression import available_encodings, compress
+from core.config import settings
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    In-process LRU cache with per-entry time to live.
+    When `maxsize` is reached the least recently used entry is evicted.
+    `on_evict` is called for every entry removed or replaced:
+    by eviction, expiration, `delete` or `set` of the same key
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        on_evict: Callable[[K, V], None] | None = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return (
+            f"<TTLCache({self.maxsize=}, {self.ttl=}, "
+            f"{self.hits=}, {self.misses=}, size={len(self)})>"
+        )
+
+    def get(self, key: K) -> V | None:
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self._evicted(key, value)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        replaced = self._data.get(key)
+
+        if replaced is not None:
+            self._evicted(key, replaced[1])
+
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            evicted_key, (_, evicted_value) = self._data.popitem(last=False)
+            self._evicted(evicted_key, evicted_value)
+
+    def delete(self, key: K) -> None:
+        entry = self._data.pop(key, None)
+
+        if entry is not None:
+            self._evicted(key, entry[1])
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def _evicted(self, key: K, value: V) -> None:
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+
+class CacheBackend(ABC):
+    """
+    Storage for serialized responses. Every entry is labeled with tags,
+    and invalidating a tag drops all entries labeled with it.
+    Maps directly onto Redis strings and sets, so a shared backend
+    can replace the in-memory one without changing callers
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, tags: Iterable[str]) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate(self, tags: Iterable[str]) -> None: ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Per-process backend. Invalidation does not reach other workers,
+    so entries there stay stale until their TTL expires
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.entries: TTLCache[str, tuple[bytes, tuple[str, ...]]] = TTLCache(
+            maxsize,
+            ttl,
+            on_evict=self._forget,
+        )
+        self._keys_by_tag: dict[str, set[str]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self.entries.get(key)
+        return None if entry is None else entry[0]
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str]) -> None:
+        tags = tuple(set(tags))
+        self.entries.set(key, (value, tags))
+
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            for key in self._keys_by_tag.pop(tag, set()):
+                self.entries.delete(key)
+
+    def _forget(self, key: str, entry: tuple[bytes, tuple[str, ...]]) -> None:
+        for tag in entry[1]:
+            keys = self._keys_by_tag.get(tag)
+
+            if keys is not None:
+                keys.discard(key)
+
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+def _variant_key(key: str, encoding: str) -> str:
+    return f"{key}#{encoding}"
+
+
+# How long invalidations are remembered to reject bodies read before them
+INVALIDATION_HISTORY: float = 60.0
+
+
+class ResponseCache:
+    """
+    Cache of serialized response bodies together with their ETags.
+    Bodies large enough to compress are also kept compressed
+    with every available encoding, so hits do not pay for compression.
+    A body read before the last invalidation of one of its tags is stale,
+    e.g. it was read from a lagging replica, and is not stored
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+        # Last invalidation time of recently invalidated tags, oldest first
+        self._invalidated_at: OrderedDict[str, float] = OrderedDict()
+        # Invalidations before this time are forgotten
+        self._history_start = time.monotonic()
+
+    async def get(
+        self,
+        key: str,
+        encoding: str | None = None,
+    ) -> tuple[str, bytes, str | None] | None:
+        """
+        Return ETag, body and its encoding. The body is compressed
+        with `encoding` if such variant is cached, otherwise it is plain
+        """
+        value = None
+
+        if encoding is not None:
+            value = await self.backend.get(_variant_key(key, encoding))
+
+        if value is None:
+            encoding = None
+            value = await self.backend.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        etag, _, body = value.partition(b"\n")
+        return etag.decode(), body, encoding
+
+    async def set(
+        self,
+        key: str,
+        etag: str,
+        body: bytes,
+        tags: Iterable[str],
+        read_at: float | None = None,
+    ) -> None:
+        """
+        Store the body. `read_at` is a `time.monotonic()` time
+        the data of the body is at least as fresh as
+        """
+        tags = list(tags)
+
+        if read_at is not None and self.is_stale(tags, read_at):
+            self.stale += 1
+            return
+
+        await self.backend.set(key, etag.encode() + b"\n" + body, tags)
+
+        if len(body) < settings.COMPRESSION_MIN_SIZE:
+            return
+
+        for encoding in available_encodings():
+            await self.backend.set(
+                _variant_key(key, encoding),
+                etag.encode() + b"\n" + compress(body, encoding),
+                tags,
+            )
+
+    def is_stale(self, tags: Iterable[str], read_at: float) -> bool:
+        if read_at < self._history_start:
+            return True
+
+        return any(
+            self._invalidated_at.get(tag, read_at) > read_at for tag in tags
+        )
+
+    async def invalidate(self, *tags: str) -> None:
+        now = time.monotonic()
+
+        for tag in tags:
+            self._invalidated_at[tag] = now
+            self._invalidated_at.move_to_end(tag)
+
+        while self._invalidated_at:
+            tag, invalidated_at = next(iter(self._invalidated_at.items()))
+
+            if invalidated_at >= now - INVALIDATION_HISTORY:
+                break
+
+            del self._invalidated_at[tag]
+            self._history_start = invalidated_at
+
+        await self.backend.invalidate(tags)
+
+
+response_cache = ResponseCache(
+    InMemoryCacheBackend(
+        maxsize=settings.RESPONSE_CACHE_SIZE,
+        ttl=settings.RESPONSE_CACHE_TTL,
+    )
+)
@@ -0,0 +1,235 @@
+import gzip
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from core.http import encoded_etag, matching_etag
+from core.metrics import timed
+
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+
+def available_encodings() -> list[str]:
+    """
+    Configured encodings in order of preference, without unsupported ones
+    """
+    return [
+        encoding
+        for encoding in settings.COMPRESSION_ENCODINGS
+        if encoding == "gzip" or (encoding == "br" and brotli is not None)
+    ]
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Pick the encoding with the highest quality in `Accept-Encoding`,
+    ties are resolved by server preference. None means identity
+    """
+    if not accept_encoding:
+        return None
+
+    qualities: dict[str, float] = {}
+
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+
+    for encoding in available_encodings():
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+def is_compressible(content_type: str | None) -> bool:
+    return content_type is not None and (
+        content_type.startswith(COMPRESSIBLE_TYPES)
+        or "+json" in content_type
+    )
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    with timed("compress"):
+        if encoding == "br":
+            return brotli.compress(
+                body,
+                quality=settings.COMPRESSION_BROTLI_QUALITY,
+            )
+
+        return gzip.compress(
+            body,
+            compresslevel=settings.COMPRESSION_GZIP_LEVEL,
+            mtime=0,
+        )
+
+
+class StreamCompressor:
+    """
+    Incremental compressor for streamed responses.
+    Every chunk is flushed, so clients get data as soon as it is sent
+    """
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+
+        if encoding == "br":
+            self._compressor = brotli.Compressor(
+                quality=settings.COMPRESSION_BROTLI_QUALITY
+            )
+        else:
+            self._compressor = zlib.compressobj(
+                settings.COMPRESSION_GZIP_LEVEL,
+                zlib.DEFLATED,
+                16 + zlib.MAX_WBITS,
+            )
+
+    def compress(self, chunk: bytes) -> bytes:
+        with timed("compress"):
+            if self.encoding == "br":
+                data = self._compressor.process(chunk)
+                return data + self._compressor.flush()
+
+            data = self._compressor.compress(chunk)
+            return data + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+
+        return self._compressor.flush()
+
+
+def _encode_etag(headers: MutableHeaders, encoding: str) -> None:
+    if "etag" in headers:
+        headers["ETag"] = encoded_etag(headers["etag"], encoding)
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with the encoding negotiated by
+    `Accept-Encoding`. Bodies shorter than `COMPRESSION_MIN_SIZE` are sent
+    as is, streamed ones are compressed chunk by chunk. Responses that
+    already have `Content-Encoding`, e.g. pre-compressed cached bodies,
+    are passed through. The app sets ETags of uncompressed bodies,
+    compressed ones get the ETag of their encoding, see `encoded_etag`
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding"))
+        start: Message | None = None
+        compressor: StreamCompressor | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+
+                if message["status"] == 304 and "etag" in headers:
+                    # Confirm the representation the client has cached
+                    matched = matching_etag(
+                        request_headers.get("if-none-match"),
+                        headers["etag"],
+                    )
+                    headers["ETag"] = matched or headers["etag"]
+                elif "content-encoding" in headers and "etag" in headers:
+                    headers["ETag"] = encoded_etag(
+                        headers["etag"],
+                        headers["content-encoding"],
+                    )
+
+                if is_compressible(headers.get("content-type")):
+                    headers.add_vary_header("Accept-Encoding")
+
+                    if encoding and "content-encoding" not in headers:
+                        # Wait for the body to decide whether to compress
+                        start = message
+                        return
+
+                await send(message)
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                message["body"] = compressor.compress(body)
+
+                if not more_body:
+                    message["body"] += compressor.finish()
+
+                await send(message)
+                return
+
+            if start is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start)
+
+            if not more_body and len(body) < max(
+                settings.COMPRESSION_MIN_SIZE, 1
+            ):
+                await send(start)
+                await send(message)
+            elif not more_body:
+                message["body"] = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                _encode_etag(headers, encoding)
+                headers["Content-Length"] = str(len(message["body"]))
+                await send(start)
+                await send(message)
+            else:
+                compressor = StreamCompressor(encoding)
+                message["body"] = compressor.compress(body)
+                headers["Content-Encoding"] = encoding
+                _encode_etag(headers, encoding)
+                del headers["Content-Length"]
+                await send(start)
+                await send(message)
+
+            start = None
+
+        await self.app(scope, receive, send_compressed)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from authx import AuthX, AuthXConfig
@@ -12,6 +13,59 @@ class Settings(BaseSettings):
     DEBUG: bool = False
 
     DB_URL: str = f"sqlite+aiosqlite:///{BASE_DIR}/db.sqlite"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = True
+    # Read-only handlers are spread over replicas, if any.
+    # Set as JSON list in environment: DB_REPLICA_URLS='["...", "..."]'
+    DB_REPLICA_URLS: list[str] = []
+    # Upper bound of replication lag in seconds. A response read
+    # from a replica is not cached if its data changed within this time
+    DB_REPLICA_MAX_LAG: float = 5.0
+
+    # SQLite production mode: WAL journal, tuned pragmas
+    # and all writes funneled through a single connection
+    SQLITE_TUNING: bool = True
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    PASSWORD_HASHING_WORKERS: int = os.cpu_count() or 1
+
+    # Posts longer than the threshold are sanitized in worker processes
+    SANITIZE_WORKERS: int = os.cpu_count() or 1
+    SANITIZE_PROCESS_THRESHOLD: int = 64 * 1024
+
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL: float = 60.0
+
+    # Claims of already verified access tokens
+    TOKEN_CACHE_SIZE: int = 4096
+    TOKEN_CACHE_TTL: float = 300.0
+    # How often revocations made by other processes are loaded
+    # and expired ones are purged
+    REVOCATION_SYNC_INTERVAL: float = 30.0
+
+    HTTP_CACHE_MAX_AGE: int = 0
+
+    # Response compression in order of preference. Brotli is used
+    # only if the package is installed, empty list disables compression
+    COMPRESSION_ENCODINGS: list[str] = ["br", "gzip"]
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Token bucket limits per route group, as `<requests>/<period>`.
+    # `auth` routes hash passwords and are limited per client address,
+    # `write` routes per user. A group missing here is not limited
+    RATE_LIMITS: dict[str, str] = {"auth": "10/minute", "write": "60/minute"}
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMIT_SHARDS: int = 16
+
+    RESPONSE_CACHE_SIZE: int = 4096
+    RESPONSE_CACHE_TTL: float = 300.0
 
 
 settings = Settings()
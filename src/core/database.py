@@ -1,23 +1,196 @@
-from asyncio import current_task
+import random
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
+from fastapi import Request
+from sqlalchemy import Engine, TextClause, event, make_url
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
+    AsyncEngine,
     AsyncSession,
-    async_scoped_session,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from core.config import settings
+from core.metrics import instrument_engine
 
 
-engine = create_async_engine(settings.DB_URL, echo=settings.DEBUG)
+class PoolMetrics:
+    """
+    Connection pool counters: how many connections were checked out
+    and how long requests waited for a free one
+    """
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"<PoolMetrics({self.checkouts=}, {self.wait_time_total=}, "
+            f"{self.wait_time_max=})>"
+        )
+
+    def record_checkout(self, wait_time: float) -> None:
+        self.checkouts += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeasuredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records time spent waiting for a connection
+    """
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        connection = super()._do_get()
+        pool_metrics.record_checkout(time.perf_counter() - started_at)
+
+        return connection
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Tune every new SQLite connection. WAL lets readers work while
+    a write is in progress, and `busy_timeout` makes a writer wait
+    for the lock instead of failing with "database is locked"
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def is_tuned_sqlite(url: str) -> bool:
+    url = make_url(url)
+    return (
+        settings.SQLITE_TUNING
+        and url.get_backend_name() == "sqlite"
+        and url.database not in (None, "", ":memory:")
+    )
+
+
+def create_engine(url: str, **kwargs) -> AsyncEngine:
+    tuned_sqlite = is_tuned_sqlite(url)
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        # Connection to a local file can not go stale,
+        # so a ping would only add a round trip per checkout
+        "pool_pre_ping": settings.DB_POOL_PRE_PING and not tuned_sqlite,
+        **kwargs,
+    }
+    async_engine = create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        poolclass=MeasuredQueuePool,
+        **options,
+    )
+
+    if tuned_sqlite:
+        event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+    instrument_engine(async_engine)
+
+    return async_engine
+
+
+engine = create_engine(settings.DB_URL)
+replica_engines = [create_engine(url) for url in settings.DB_REPLICA_URLS]
+
+# SQLite allows one writer at a time. Instead of letting pooled connections
+# race for the lock, tuned SQLite sends every write through one connection,
+# and concurrent writers wait in the pool queue. Other databases write
+# through the main pool
+if is_tuned_sqlite(settings.DB_URL):
+    writer_engine = create_engine(
+        settings.DB_URL,
+        pool_size=1,
+        max_overflow=0,
+    )
+else:
+    writer_engine = engine
+
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+# Raw SQL starting with other keywords is assumed to write
+READ_ONLY_KEYWORDS = ("SELECT", "EXPLAIN")
+
+
+def is_write(clause) -> bool:
+    """
+    Whether a statement writes. `text()` statements are not marked as DML,
+    so raw SQL like DDL is told apart by its first keyword
+    """
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().upper().startswith(READ_ONLY_KEYWORDS)
+
+    return getattr(clause, "is_dml", False)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads of a read-only session to one of replicas.
+    A session is read-only if created with `info={"read_only": True}`.
+    The first write switches the transaction to the writer connection
+    of primary. Once it ends, reads go to the primary pool, so they still
+    see the write and do not hold the only writer connection.
+    Reads that must not lag, e.g. security checks, are sent to primary
+    with `bind_arguments={"primary": True}`
+    """
+
+    def get_bind(
+        self,
+        mapper=None,
+        clause=None,
+        primary: bool = False,
+        **kwargs,
+    ) -> Engine:
+        if self._flushing or is_write(clause):
+            self.info["read_only"] = False
+            self.info["has_written"] = True
+
+        if self.info.get("has_written"):
+            return writer_engine.sync_engine
+
+        if primary or not self.info.get("read_only") or not replica_engines:
+            return engine.sync_engine
+
+        if "replica" not in self.info:
+            self.info["replica"] = random.choice(replica_engines)
+
+        return self.info["replica"].sync_engine
+
+
+def replication_lag(session: AsyncSession) -> float:
+    """
+    How far behind primary reads of `session` may be
+    """
+    return settings.DB_REPLICA_MAX_LAG if "replica" in session.info else 0.0
+
+
+@event.listens_for(RoutingSession, "after_commit")
+@event.listens_for(RoutingSession, "after_rollback")
+def release_writer(session: Session) -> None:
+    session.info.pop("has_written", None)
+
 
 session_maker = async_sessionmaker(
     engine,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
     autoflush=False,
 )
@@ -50,25 +223,23 @@ async def delete_tables() -> None:
         await connection.run_sync(Base.metadata.drop_all)
 
 
-def get_scoped_session():
-    return async_scoped_session(
-        session_factory=session_maker,
-        scopefunc=current_task,
-    )
-
+async def get_session(
+    request: Request,
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Request-scoped session dependency. FastAPI caches dependencies
+    within a request, so every dependency of one request shares
+    this session, and it is closed when the request is done.
+    Read-only requests are served by replicas
+    """
+    read_only = request.method in READ_ONLY_METHODS
 
-@asynccontextmanager
-async def session_dependency() -> AsyncGenerator[AsyncSession, None]:
-    async with session_maker() as session:
+    async with session_maker(info={"read_only": read_only}) as session:
         yield session
-        await session.close()
 
 
 @asynccontextmanager
-async def scoped_session_dependency() -> AsyncGenerator[AsyncSession, None]:
-    session = get_scoped_session()
-
-    try:
+async def session_dependency() -> AsyncGenerator[AsyncSession, None]:
+    async with session_maker() as session:
         yield session
-    finally:
         await session.close()
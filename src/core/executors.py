@@ -0,0 +1,71 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, ParamSpec, TypeVar
+
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    """
+    Thread pool for CPU-heavy blocking calls made from async code.
+    At most `max_workers` calls run at once, the rest wait in a queue,
+    so the event loop itself is never blocked.
+    All counters are updated on the event loop thread only.
+
+    With `processes=True` calls run in worker processes instead,
+    which suits pure Python work that holds the GIL.
+    Functions and arguments must be picklable then
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        name: str,
+        processes: bool = False,
+    ) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+
+        self._executor: Executor
+
+        if processes:
+            # Forking a process with running threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix=name,
+            )
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    def __repr__(self) -> str:
+        return (
+            f"<BoundedExecutor({self.name=}, {self.max_workers=}, "
+            f"{self.queued=}, {self.running=}, {self.completed=})>"
+        )
+
+    async def run(self, func: Callable[P, T], *args: P.args) -> T:
+        loop = asyncio.get_running_loop()
+        self.queued += 1
+
+        async with self._semaphore:
+            self.queued -= 1
+            self.running += 1
+
+            try:
+                return await loop.run_in_executor(self._executor, func, *args)
+            finally:
+                self.running -= 1
+                self.completed += 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,75 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+from core.config import settings
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Build a strong ETag from values that identify a representation,
+    e.g. row IDs and versions
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE}",
+    }
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag of the representation compressed with `encoding`. Strong ETags
+    must differ between content codings, so the coding is appended
+    """
+    return etag.removesuffix('"') + f'-{encoding}"'
+
+
+def identity_etag(etag: str) -> str:
+    """
+    Reverse of `encoded_etag`, ETags of `make_etag` contain no dashes
+    """
+    etag = etag.removeprefix("W/")
+    base, dash, _ = etag.rpartition("-")
+
+    return f'{base}"' if dash else etag
+
+
+def matching_etag(header: str | None, etag: str) -> str | None:
+    """
+    Tag of an `If-None-Match` header that refers to `etag`
+    in any content coding
+    """
+    if header is None:
+        return None
+
+    for tag in header.split(","):
+        tag = tag.strip().removeprefix("W/")
+
+        if identity_etag(tag) == etag:
+            return tag
+
+    return None
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check `If-None-Match` header of the request against `etag`
+    """
+    header = request.headers.get("if-none-match")
+
+    if header is not None and header.strip() == "*":
+        return True
+
+    return matching_etag(header, etag) is not None
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=cache_headers(etag),
+    )
@@ -0,0 +1,251 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+SLOWEST_STATEMENT_LENGTH = 200
+
+
+class RequestTimings:
+    """
+    Where the time of one request went: SQL statements
+    and named spans such as serialization or password hashing
+    """
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest_statement = ""
+        self.slowest_statement_time = 0.0
+        self.spans: dict[str, float] = {}
+
+    def record_statement(self, statement: str, duration: float) -> None:
+        self.statements += 1
+        self.db_time += duration
+
+        if duration > self.slowest_statement_time:
+            self.slowest_statement_time = duration
+            self.slowest_statement = statement
+
+    def record_span(self, name: str, duration: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def server_timing(self, total: float) -> str:
+        entries = [
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} queries"',
+            f"db-slowest;dur={self.slowest_statement_time * 1000:.2f}",
+            *(
+                f"{name};dur={duration * 1000:.2f}"
+                for name, duration in self.spans.items()
+            ),
+            f"total;dur={total * 1000:.2f}",
+        ]
+        return ", ".join(entries)
+
+
+class RouteStats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.seconds = 0.0
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.spans: dict[str, float] = {}
+
+
+_current_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "current_timings",
+    default=None,
+)
+
+# Totals per (method, route, status) since the process started
+route_stats: dict[tuple[str, str, int], RouteStats] = {}
+
+# Slowest statement seen by the process and its duration
+slowest_statement: tuple[str, float] = ("", 0.0)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Add time spent in the block to span `name` of the current request
+    """
+    timings = _current_timings.get()
+
+    if timings is None:
+        yield
+        return
+
+    started_at = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        timings.record_span(name, time.perf_counter() - started_at)
+
+
+def _before_cursor_execute(connection, *args) -> None:
+    connection.info.setdefault("query_started_at", []).append(
+        time.perf_counter()
+    )
+
+
+def _after_cursor_execute(connection, cursor, statement, *args) -> None:
+    started_at = connection.info["query_started_at"].pop()
+    timings = _current_timings.get()
+
+    if timings is not None:
+        timings.record_statement(statement, time.perf_counter() - started_at)
+
+
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+
+    if connection is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Record every statement executed by `engine`
+    into timings of the current request
+    """
+    sync_engine = engine.sync_engine
+
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def _record_request(
+    scope: Scope,
+    status_code: int,
+    timings: RequestTimings,
+    duration: float,
+) -> None:
+    global slowest_statement
+
+    route = scope.get("route")
+    path = getattr(route, "path", "<unmatched>")
+    key = (scope["method"], path, status_code)
+
+    if key not in route_stats:
+        route_stats[key] = RouteStats()
+
+    stats = route_stats[key]
+    stats.requests += 1
+    stats.seconds += duration
+    stats.statements += timings.statements
+    stats.db_seconds += timings.db_time
+
+    for name, span_duration in timings.spans.items():
+        stats.spans[name] = stats.spans.get(name, 0.0) + span_duration
+
+    if timings.slowest_statement_time > slowest_statement[1]:
+        slowest_statement = (
+            timings.slowest_statement[:SLOWEST_STATEMENT_LENGTH],
+            timings.slowest_statement_time,
+        )
+
+
+class TimingMiddleware:
+    """
+    Collect timings of every HTTP request, report them
+    in `Server-Timing` response header and add them to `route_stats`
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timings(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    timings.server_timing(time.perf_counter() - started_at),
+                )
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _current_timings.reset(token)
+            _record_request(
+                scope,
+                status_code,
+                timings,
+                time.perf_counter() - started_at,
+            )
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def render_prometheus(
+    counters: dict[str, float],
+    gauges: dict[str, float],
+) -> str:
+    """
+    Render route totals, `counters` and `gauges` in Prometheus text format
+    """
+    route_counters = {
+        "http_requests_total": lambda stats: stats.requests,
+        "http_request_duration_seconds_sum": lambda stats: stats.seconds,
+        "db_statements_total": lambda stats: stats.statements,
+        "db_duration_seconds_sum": lambda stats: stats.db_seconds,
+    }
+    lines: list[str] = []
+
+    for name, value_of in route_counters.items():
+        lines.append(f"# TYPE {name} counter")
+
+        for (method, path, status_code), stats in route_stats.items():
+            labels = (
+                f'method="{method}",route="{_escape(path)}",'
+                f'status="{status_code}"'
+            )
+            lines.append(f"{name}{{{labels}}} {value_of(stats)}")
+
+    lines.append("# TYPE span_duration_seconds_sum counter")
+
+    for (method, path, status_code), stats in route_stats.items():
+        for span, seconds in stats.spans.items():
+            labels = (
+                f'method="{method}",route="{_escape(path)}",'
+                f'status="{status_code}",span="{span}"'
+            )
+            lines.append(f"span_duration_seconds_sum{{{labels}}} {seconds}")
+
+    statement, seconds = slowest_statement
+    lines.append("# TYPE db_slowest_statement_seconds gauge")
+    lines.append(
+        f'db_slowest_statement_seconds{{statement="{_escape(statement)}"}} '
+        f"{seconds}"
+    )
+
+    for kind, values in (("counter", counters), ("gauge", gauges)):
+        for name, value in values.items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
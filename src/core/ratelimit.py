@@ -0,0 +1,156 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, Request, status
+
+from core.config import settings
+
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    Token bucket: holds up to `capacity` tokens and is refilled
+    by `rate` tokens per second, every request takes one
+    """
+
+    capacity: float
+    rate: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Rule":
+        """
+        Parse rules like `10/minute`: a burst of 10 requests,
+        refilled evenly over a minute
+        """
+        count, _, period = value.partition("/")
+
+        if period not in PERIODS:
+            raise ValueError(f"Unknown rate limit period in '{value}'")
+
+        if float(count) <= 0:
+            raise ValueError(f"Rate limit must be positive in '{value}'")
+
+        return cls(capacity=float(count), rate=float(count) / PERIODS[period])
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage of token buckets. `acquire` must take tokens atomically,
+    e.g. with a Lua script in Redis, so limits hold across workers
+    when a shared backend replaces the in-memory one
+    """
+
+    @abstractmethod
+    async def acquire(self, key: str, rule: Rule, cost: float = 1) -> float:
+        """
+        Take `cost` tokens from the bucket of `key`.
+        Return 0 on success, otherwise seconds until enough tokens refill
+        """
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process backend. Buckets are spread over shards by key,
+    every shard is an LRU of at most `max_keys / shards` buckets,
+    so memory stays constant however many clients there are.
+    An evicted bucket was idle the longest and is most likely full anyway
+    """
+
+    def __init__(self, max_keys: int, shards: int) -> None:
+        self.max_keys_per_shard = max(max_keys // shards, 1)
+        self.shards: list[OrderedDict[str, tuple[float, float]]] = [
+            OrderedDict() for _ in range(shards)
+        ]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    async def acquire(self, key: str, rule: Rule, cost: float = 1) -> float:
+        shard = self.shards[hash(key) % len(self.shards)]
+        now = time.monotonic()
+        tokens, updated_at = shard.pop(key, (rule.capacity, now))
+        tokens = min(rule.capacity, tokens + (now - updated_at) * rule.rate)
+        retry_after = 0.0
+
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / rule.rate
+
+        shard[key] = (tokens, now)
+
+        if len(shard) > self.max_keys_per_shard:
+            shard.popitem(last=False)
+
+        return retry_after
+
+
+class RateLimiter:
+    """
+    Token bucket limits per route group, e.g. `auth` or `write`.
+    Groups without a rule are not limited
+    """
+
+    def __init__(self, backend: RateLimitBackend, rules: dict[str, Rule]):
+        self.backend = backend
+        self.rules = rules
+        self.allowed = 0
+        self.rejected = 0
+
+    async def check(self, group: str, key: str) -> None:
+        rule = self.rules.get(group)
+
+        if rule is None:
+            return
+
+        retry_after = await self.backend.acquire(f"{group}:{key}", rule)
+
+        if not retry_after:
+            self.allowed += 1
+            return
+
+        self.rejected += 1
+
+        raise HTTPException(
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            "Too many requests, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+rate_limiter = RateLimiter(
+    InMemoryRateLimitBackend(
+        max_keys=settings.RATE_LIMIT_MAX_KEYS,
+        shards=settings.RATE_LIMIT_SHARDS,
+    ),
+    {
+        group: Rule.parse(value)
+        for group, value in settings.RATE_LIMITS.items()
+    },
+)
+
+
+def client_ip(request: Request) -> str:
+    """
+    Address of the client. Behind a reverse proxy run uvicorn
+    with `--proxy-headers` so it is taken from `X-Forwarded-For`
+    """
+    return request.client.host if request.client else "unknown"
+
+
+def limit_by_ip(group: str) -> Callable[[Request], Awaitable[None]]:
+    """
+    Dependency limiting requests of the route group per client address
+    """
+
+    async def dependency(request: Request) -> None:
+        await rate_limiter.check(group, f"ip:{client_ip(request)}")
+
+    return dependency
@@ -1,7 +1,19 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 
+from auth.services import (
+    password_executor,
+    revocation_list,
+    user_cache,
+    verified_tokens,
+)
 from auth.views import router as auth_router
+from blog.content import sanitize_executor
 from blog.views import categories_router, posts_router
+from core.cache import response_cache
+from core.database import engine, pool_metrics
+from core.metrics import render_prometheus
+from core.ratelimit import rate_limiter
 
 
 router = APIRouter(prefix="/api/v1")
@@ -9,3 +21,38 @@ router = APIRouter(prefix="/api/v1")
 router.include_router(auth_router)
 router.include_router(posts_router)
 router.include_router(categories_router)
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    counters = {
+        "db_pool_checkouts_total": pool_metrics.checkouts,
+        "db_pool_wait_seconds_sum": pool_metrics.wait_time_total,
+        "password_hashing_completed_total": password_executor.completed,
+        "sanitize_offloaded_total": sanitize_executor.completed,
+        "user_cache_hits_total": user_cache.hits,
+        "user_cache_misses_total": user_cache.misses,
+        "token_cache_hits_total": verified_tokens.hits,
+        "token_cache_misses_total": verified_tokens.misses,
+        "response_cache_hits_total": response_cache.hits,
+        "response_cache_misses_total": response_cache.misses,
+        "response_cache_stale_total": response_cache.stale,
+        "rate_limit_allowed_total": rate_limiter.allowed,
+        "rate_limit_rejected_total": rate_limiter.rejected,
+    }
+    gauges = {
+        "db_pool_checked_out": engine.pool.checkedout(),
+        "db_pool_wait_seconds_max": pool_metrics.wait_time_max,
+        "password_hashing_queued": password_executor.queued,
+        "password_hashing_running": password_executor.running,
+        "sanitize_queued": sanitize_executor.queued,
+        "sanitize_running": sanitize_executor.running,
+        "user_cache_size": len(user_cache),
+        "token_cache_size": len(verified_tokens),
+        "revoked_tokens": len(revocation_list),
+        "rate_limit_buckets": len(rate_limiter.backend),
+    }
+
+    return PlainTextResponse(render_prometheus(counters, gauges))
@@ -1,21 +1,43 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
 
+from auth.services import (
+    password_executor,
+    run_revocation_sync,
+    sync_revocations,
+)
+from blog.content import sanitize_executor
+from core.compression import CompressionMiddleware
 from core.config import auth, settings
-from core.database import create_tables
-from core.views import router
+from core.database import create_tables, session_maker
+from core.metrics import TimingMiddleware
+from core.views import metrics_router, router
 
 
 @asynccontextmanager
 async def fastapi_lifespan(app: FastAPI):
     await create_tables()
+
+    async with session_maker() as session:
+        await sync_revocations(session)
+
+    revocation_sync = asyncio.create_task(
+        run_revocation_sync(settings.REVOCATION_SYNC_INTERVAL)
+    )
     yield
+    revocation_sync.cancel()
+    password_executor.shutdown()
+    sanitize_executor.shutdown()
 
 
 app = FastAPI(debug=settings.DEBUG, lifespan=fastapi_lifespan)
 app.include_router(router)
+app.include_router(metrics_router)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(TimingMiddleware)
 
 auth.handle_errors(app)
 
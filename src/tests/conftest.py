@@ -0,0 +1,165 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+# Settings are read on import, so the test database must be set
+# before the application is imported. Rate limits are disabled,
+# tests of the limiter build their own
+DATABASE_DIR = tempfile.mkdtemp(prefix="blog-tests-")
+os.environ["DB_URL"] = f"sqlite+aiosqlite:///{Path(DATABASE_DIR) / 'test.db'}"
+os.environ["RATE_LIMITS"] = "{}"
+
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+
+from auth import services as auth_services  # noqa: E402
+from auth.models import User, UserRole  # noqa: E402
+from auth.revocation import RevocationList  # noqa: E402
+from auth.schemas import RegisterData  # noqa: E402
+from blog import services as blog_services  # noqa: E402
+from blog.schemas import CategoryCreate, PostCreate  # noqa: E402
+from core.cache import InMemoryCacheBackend, response_cache  # noqa: E402
+from core.config import settings  # noqa: E402
+from core.database import (  # noqa: E402
+    create_tables,
+    delete_tables,
+    engine,
+    replica_engines,
+    session_maker,
+    writer_engine,
+)
+from main import app  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+async def database(monkeypatch):
+    """
+    Fresh tables and empty in-process caches for every test
+    """
+    await delete_tables()
+
+    async with engine.begin() as connection:
+        await connection.execute(text("DROP TABLE IF EXISTS posts_fts"))
+
+    await create_tables()
+
+    auth_services.user_cache.clear()
+    auth_services.verified_tokens.clear()
+    auth_services.token_versions.clear()
+    monkeypatch.setattr(auth_services, "revocation_list", RevocationList())
+    monkeypatch.setattr(
+        response_cache,
+        "backend",
+        InMemoryCacheBackend(
+            maxsize=settings.RESPONSE_CACHE_SIZE,
+            ttl=settings.RESPONSE_CACHE_TTL,
+        ),
+    )
+
+    yield
+
+
+@pytest.fixture
+async def client():
+    # Unhandled errors are returned as 500 responses, as in production
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://test/api/v1",
+    ) as client:
+        yield client
+
+
+@pytest.fixture
+async def session():
+    async with session_maker() as session:
+        yield session
+
+
+@pytest.fixture
+async def admin(session) -> User:
+    user = await auth_services.register_new_user(
+        session,
+        RegisterData(email="admin@example.com", password="password"),
+    )
+    return await auth_services.set_user_role(session, user, UserRole.ADMIN)
+
+
+@pytest.fixture
+def admin_headers(admin) -> dict[str, str]:
+    tokens = auth_services.create_tokens(admin)
+    return {"Authorization": f"Bearer {tokens.access_token}"}
+
+
+@pytest.fixture
+def statements():
+    """
+    SQL statements executed by every engine while the test runs
+    """
+    executed: list[str] = []
+
+    def record(connection, cursor, statement, *args) -> None:
+        executed.append(statement)
+
+    engines = {engine, writer_engine, *replica_engines}
+
+    for async_engine in engines:
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+
+    yield executed
+
+    for async_engine in engines:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+async def categories(session) -> list[str]:
+    slugs = [f"category_{i}" for i in range(3)]
+
+    for slug in slugs:
+        await blog_services.create_category(
+            session,
+            CategoryCreate(name=slug.title(), slug=slug),
+        )
+
+    return slugs
+
+
+@pytest.fixture
+def create_posts(session, admin, categories):
+    """
+    Create posts through services, post `i` is in first `i % 3 + 1`
+    categories. Return IDs of created posts
+    """
+    created = 0
+
+    async def create(count: int) -> list[int]:
+        nonlocal created
+        ids = []
+
+        for i in range(created, created + count):
+            post = await blog_services.create_post(
+                session,
+                admin,
+                PostCreate(
+                    title=f"Post {i}",
+                    slug=f"post-{i}",
+                    content=f"Content of **post {i}**",
+                    categories=categories[: i % len(categories) + 1],
+                ),
+            )
+            ids.append(post.id)
+
+        created += count
+        return ids
+
+    return create
@@ -0,0 +1,168 @@
+import sqlite3
+from types import SimpleNamespace
+
+import jwt
+import pytest
+
+from auth import services
+from auth.models import UserRole
+from auth.revocation import RevocationList
+from core import database
+from core.database import create_engine, session_maker
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cached_user_survives_rolled_back_write(
+    client,
+    admin_headers,
+    categories,
+    create_posts,
+):
+    await create_posts(1)
+    post = {
+        "title": "Post",
+        "slug": "post-0",
+        "content": "Content",
+        "categories": categories[:1],
+    }
+
+    # The user is loaded and cached by a request whose write fails
+    # with a duplicate slug and rolls the session back
+    response = await client.post("/posts/", json=post, headers=admin_headers)
+    assert response.status_code == 409
+
+    response = await client.get("/auth/me", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "admin@example.com"
+
+    post["slug"] = "post-1"
+    response = await client.post("/posts/", json=post, headers=admin_headers)
+    assert response.status_code == 201
+
+
+async def test_cached_user_is_not_shared_between_sessions(admin):
+    async with session_maker() as first, session_maker() as second:
+        user = await services.get_cached_user_by_id(first, admin.id)
+        # Pending change of a request that has not committed yet
+        user.full_name = "Changed"
+
+        cached = await services.get_cached_user_by_id(second, admin.id)
+
+        assert cached is not user
+        assert cached.full_name is None
+
+
+async def test_refresh_token_can_not_be_replayed_to_another_process(
+    client,
+    admin,
+    monkeypatch,
+):
+    tokens = services.create_tokens(admin)
+    data = {"refresh_token": tokens.refresh_token}
+
+    response = await client.post("/auth/refresh", json=data)
+    assert response.status_code == 200
+
+    # Another process has not synced the revocation yet
+    monkeypatch.setattr(services, "revocation_list", RevocationList())
+
+    response = await client.post("/auth/refresh", json=data)
+    assert response.status_code == 401
+
+
+@pytest.fixture
+def same_second(monkeypatch):
+    """
+    Make revocations happen within the second the token was issued in
+    """
+
+    def freeze(token: str) -> None:
+        payload = jwt.decode(token, options={"verify_signature": False})
+        monkeypatch.setattr(
+            services,
+            "time",
+            SimpleNamespace(time=lambda: payload["iat"] + 0.9),
+        )
+
+    return freeze
+
+
+async def test_logout_everywhere_revokes_tokens_of_the_same_second(
+    client,
+    admin,
+    same_second,
+):
+    current = services.create_tokens(admin)
+    other = services.create_tokens(admin)
+    same_second(other.access_token)
+
+    response = await client.post(
+        "/auth/logout",
+        json={"everywhere": True},
+        headers={"Authorization": f"Bearer {current.access_token}"},
+    )
+    assert response.status_code == 204
+
+    response = await client.post(
+        "/auth/refresh",
+        json={"refresh_token": other.refresh_token},
+    )
+    assert response.status_code == 401
+
+    response = await client.post(
+        "/categories/",
+        json={"name": "Category", "slug": "category"},
+        headers={"Authorization": f"Bearer {other.access_token}"},
+    )
+    assert response.status_code == 401
+
+
+async def test_demotion_revokes_tokens_of_the_same_second(
+    client,
+    admin,
+    session,
+    same_second,
+):
+    tokens = services.create_tokens(admin)
+    same_second(tokens.refresh_token)
+
+    await services.set_user_role(session, admin, UserRole.USER)
+
+    response = await client.post(
+        "/auth/refresh",
+        json={"refresh_token": tokens.refresh_token},
+    )
+    assert response.status_code == 401
+
+
+async def test_token_version_is_not_read_from_lagging_replica(
+    client,
+    admin,
+    session,
+    monkeypatch,
+    tmp_path,
+):
+    tokens = services.create_tokens(admin)
+    headers = {"Authorization": f"Bearer {tokens.access_token}"}
+
+    # The replica is a copy of the database taken before the demotion
+    path = tmp_path / "replica.db"
+
+    with sqlite3.connect(database.engine.url.database) as source:
+        with sqlite3.connect(path) as replica:
+            source.backup(replica)
+
+    replica = create_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(database, "replica_engines", [replica])
+
+    await services.set_user_role(session, admin, UserRole.USER)
+    # Another process has neither the new version nor the watermark yet
+    services.token_versions.clear()
+    monkeypatch.setattr(services, "revocation_list", RevocationList())
+
+    response = await client.get("/auth/me", headers=headers)
+    assert response.status_code == 401
+
+    await replica.dispose()
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from core import cache, database
+from core.cache import InMemoryCacheBackend, ResponseCache, response_cache
+from core.config import settings
+
+
+pytestmark = pytest.mark.anyio
+
+
+def make_cache() -> ResponseCache:
+    return ResponseCache(InMemoryCacheBackend(maxsize=16, ttl=60))
+
+
+async def test_body_read_before_invalidation_is_not_cached():
+    response_cache = make_cache()
+    read_at = time.monotonic()
+
+    await response_cache.invalidate("posts")
+    await response_cache.set("stale", "1", b"[]", ["posts"], read_at)
+    await response_cache.set("other", "1", b"[]", ["users"], read_at)
+    await response_cache.set(
+        "fresh", "2", b"[]", ["posts"], time.monotonic()
+    )
+
+    assert await response_cache.get("stale", None) is None
+    assert await response_cache.get("other", None) is not None
+    assert await response_cache.get("fresh", None) is not None
+    assert response_cache.stale == 1
+
+
+async def test_body_read_before_forgotten_invalidations_is_not_cached(
+    monkeypatch,
+):
+    monkeypatch.setattr(cache, "INVALIDATION_HISTORY", 0.0)
+    response_cache = make_cache()
+    read_at = time.monotonic()
+
+    await response_cache.invalidate("posts")
+    await response_cache.invalidate("users")
+    await response_cache.set("stale", "1", b"[]", ["posts"], read_at)
+
+    assert await response_cache.get("stale", None) is None
+
+
+async def test_replica_reads_are_not_cached_within_lag(
+    client,
+    categories,
+    monkeypatch,
+):
+    # The primary stands in for a replica
+    monkeypatch.setattr(database, "replica_engines", [database.engine])
+
+    for _ in range(2):
+        hits = response_cache.hits
+        response = await client.get("/categories/")
+
+        assert response.status_code == 200
+        assert response_cache.hits == hits
+
+    monkeypatch.setattr(settings, "DB_REPLICA_MAX_LAG", 0.0)
+    await client.get("/categories/")
+    hits = response_cache.hits
+    response = await client.get("/categories/")
+
+    assert response.status_code == 200
+    assert response_cache.hits == hits + 1
+
+
+async def test_invalidation_forgets_keys_under_other_tags():
+    backend = InMemoryCacheBackend(maxsize=16, ttl=60)
+
+    for i in range(100):
+        await backend.set(f"post?{i}", b"{}", ["post:1", "category:a"])
+        await backend.invalidate(["post:1"])
+
+    await backend.set("post", b"{}", ["post:1"])
+    await backend.set("post", b"{}", ["post:2"])
+
+    assert len(backend.entries) == 1
+    assert backend._keys_by_tag == {"post:2": {"post"}}
+
+
+async def test_unknown_query_parameters_share_cached_response(
+    client,
+    create_posts,
+):
+    await create_posts(3)
+    url = "/posts/categories/category_0/posts"
+
+    response = await client.get(url, params={"limit": 2})
+    assert response.status_code == 200
+
+    for i in range(3):
+        hits = response_cache.hits
+        cached = await client.get(url, params={"limit": 2, "x": i})
+
+        assert cached.content == response.content
+        assert response_cache.hits == hits + 1
+
+    assert len(response_cache.backend.entries) == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from core.config import settings
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def compress_everything(monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 1)
+    monkeypatch.setattr(settings, "COMPRESSION_ENCODINGS", ["gzip"])
+
+
+async def _get(client, url: str, encoding: str, **headers):
+    response = await client.get(
+        url,
+        headers={"Accept-Encoding": encoding, **headers},
+    )
+    assert response.status_code in (200, 304)
+
+    return response
+
+
+@pytest.mark.parametrize("url", ["/posts/", "/posts/{post_id}"])
+async def test_encodings_have_distinct_etags(client, create_posts, url):
+    (post_id,) = await create_posts(1)
+    url = url.format(post_id=post_id)
+
+    # Compressed on the fly, then served from cache where cached
+    compressed = await _get(client, url, "gzip")
+    cached = await _get(client, url, "gzip")
+    identity = await _get(client, url, "identity")
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in identity.headers
+    assert compressed.headers["ETag"] == cached.headers["ETag"]
+    assert compressed.headers["ETag"] != identity.headers["ETag"]
+    assert compressed.content == identity.content
+
+    for response, encoding in ((compressed, "gzip"), (identity, "identity")):
+        etag = response.headers["ETag"]
+        revalidated = await _get(
+            client,
+            url,
+            encoding,
+            **{"If-None-Match": etag},
+        )
+
+        assert revalidated.status_code == 304
+        assert revalidated.headers["ETag"] == etag
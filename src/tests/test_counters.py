@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import select, text
+
+from auth.models import User
+from blog import services
+from blog.models import Category
+from core.database import session_maker, writer_engine
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _category_counters() -> dict[str, tuple[int, int | None]]:
+    async with session_maker() as session:
+        result = await session.execute(
+            select(Category.slug, Category.post_count, Category.last_post_id)
+        )
+
+        return {slug: (count, last_id) for slug, count, last_id in result}
+
+
+async def _author_counters(user_id: int) -> tuple[int, int | None]:
+    async with session_maker() as session:
+        result = await session.execute(
+            select(User.post_count, User.last_post_id).where(
+                User.id == user_id
+            )
+        )
+
+        return tuple(result.one())
+
+
+async def test_counters_follow_posts(
+    client,
+    admin,
+    admin_headers,
+    create_posts,
+):
+    first, second, third = await create_posts(3)
+
+    assert await _category_counters() == {
+        "category_0": (3, third),
+        "category_1": (2, third),
+        "category_2": (1, third),
+    }
+    assert await _author_counters(admin.id) == (3, third)
+
+    response = await client.patch(
+        f"/posts/{third}",
+        json={"categories": ["category_0"]},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+
+    assert await _category_counters() == {
+        "category_0": (3, third),
+        "category_1": (1, second),
+        "category_2": (0, None),
+    }
+
+    response = await client.delete(f"/posts/{second}", headers=admin_headers)
+    assert response.status_code < 300
+
+    assert await _category_counters() == {
+        "category_0": (2, third),
+        "category_1": (0, None),
+        "category_2": (0, None),
+    }
+    assert await _author_counters(admin.id) == (2, third)
+
+
+async def test_update_renders_before_taking_writer(
+    client,
+    admin_headers,
+    create_posts,
+    monkeypatch,
+):
+    (post_id,) = await create_posts(1)
+    render_content = services.render_content
+    checked_out = []
+
+    async def render(content: str):
+        checked_out.append(writer_engine.pool.checkedout())
+        return await render_content(content)
+
+    monkeypatch.setattr(services, "render_content", render)
+
+    response = await client.patch(
+        f"/posts/{post_id}",
+        json={"content": "New content", "categories": ["category_1"]},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    assert checked_out == [0]
+
+
+async def test_reconcile_post_counters(admin, create_posts, session):
+    *_, last = await create_posts(3)
+    expected = await _category_counters()
+
+    assert await services.reconcile_post_counters(session) == 0
+
+    await session.execute(
+        text("UPDATE categories SET post_count = 42, last_post_id = NULL")
+    )
+    await session.execute(text("UPDATE users SET post_count = 0"))
+    await session.commit()
+
+    assert await services.reconcile_post_counters(session) == 4
+    assert await _category_counters() == expected
+    assert await _author_counters(admin.id) == (3, last)
+    assert await services.reconcile_post_counters(session) == 0
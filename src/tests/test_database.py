@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import select, text
+
+from blog.models import Category
+from core.database import engine, writer_engine
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_reads_after_commit_do_not_hold_writer(session, categories):
+    assert writer_engine is not engine
+
+    await session.execute(select(Category))
+
+    assert session.get_bind() is engine.sync_engine
+    assert writer_engine.pool.checkedout() == 0
+
+
+async def test_raw_sql_writes_go_through_writer(session):
+    await session.execute(text("SELECT 1"))
+    assert session.get_bind() is engine.sync_engine
+
+    await session.execute(text("CREATE TABLE scratch (id INTEGER)"))
+    assert session.get_bind() is writer_engine.sync_engine
+    assert writer_engine.pool.checkedout() == 1
+
+    await session.execute(text("DROP TABLE scratch"))
+    await session.commit()
+    assert writer_engine.pool.checkedout() == 0
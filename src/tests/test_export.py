@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_export_keeps_markdown_source(client, create_posts):
+    await create_posts(2)
+
+    response = await client.get("/posts/export")
+    assert response.status_code == 200
+
+    posts = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [post["raw_content"] for post in posts] == [
+        "Content of **post 0**",
+        "Content of **post 1**",
+    ]
+    assert "<strong>post 0</strong>" in posts[0]["content"]
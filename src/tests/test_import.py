@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import insert
+
+from blog import services
+from blog.models import Post
+from blog.schemas import PostCreate
+from core.database import session_maker
+
+
+pytestmark = pytest.mark.anyio
+
+
+def _post(slug: str, categories: list[str]) -> PostCreate:
+    return PostCreate(
+        title=slug.title(),
+        slug=slug,
+        content=f"Content of {slug}",
+        categories=categories,
+    )
+
+
+async def test_rolled_back_chunk_does_not_reserve_slugs(
+    session,
+    admin,
+    categories,
+    monkeypatch,
+):
+    render_many = services.render_many
+    calls = 0
+
+    async def render_racing_with_writer(contents):
+        nonlocal calls
+        calls += 1
+
+        # A concurrent request takes a slug of the first chunk
+        # after it was checked, so its insert fails
+        if calls == 1:
+            async with session_maker() as other:
+                await other.execute(
+                    insert(Post),
+                    [{"title": "A", "slug": "a", "content": "", "version": 1}],
+                )
+                await other.commit()
+
+        return await render_many(contents)
+
+    monkeypatch.setattr(services, "render_many", render_racing_with_writer)
+
+    results = await services.import_posts(
+        session,
+        admin,
+        [_post("a", categories), _post("b", categories), _post("b", [])],
+        chunk_size=2,
+    )
+
+    assert [result.id for result in results[:2]] == [None, None]
+    assert all("rolled back" in result.error for result in results[:2])
+    assert results[2].error is None
+    assert results[2].id is not None
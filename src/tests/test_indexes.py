@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import event, select
+
+from auth.models import User
+from blog import services
+from blog.models import Post
+from core.database import engine
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _query_plan(statement: str, parameters=()) -> str:
+    async with engine.connect() as connection:
+        result = await connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}",
+            parameters,
+        )
+
+        return "\n".join(row.detail for row in result)
+
+
+async def test_category_page_uses_link_index(create_posts, session):
+    ids = await create_posts(6)
+    executed = []
+
+    def record(connection, cursor, statement, parameters, *args) -> None:
+        executed.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+
+    try:
+        await services.get_posts_by_category(
+            session,
+            "category_0",
+            after_id=ids[1],
+            limit=2,
+        )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    # Related rows are loaded by later statements
+    plan = await _query_plan(*executed[0])
+
+    assert "ix_post_category_category_slug_post_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+async def test_newest_post_of_author_uses_author_index(create_posts):
+    await create_posts(3)
+    statement = select(
+        User.id,
+        services._last_post(*services.AUTHOR_COUNTERS, Post.id, 1),
+    ).compile(engine.sync_engine, compile_kwargs={"literal_binds": True})
+
+    plan = await _query_plan(str(statement))
+
+    assert "ix_posts_author_id_id" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,49 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _count_statements(client, statements, url: str) -> int:
+    statements.clear()
+    response = await client.get(url)
+    assert response.status_code == 200
+
+    return len(statements)
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/posts/",
+        "/posts/categories/category_0/posts",
+        "/posts/{last_id}",
+    ],
+)
+async def test_statement_count_does_not_depend_on_posts(
+    client,
+    create_posts,
+    statements,
+    url,
+):
+    """
+    Authors and categories are loaded with the posts, not per post (N+1)
+    """
+    ids = await create_posts(3)
+    few = await _count_statements(
+        client,
+        statements,
+        url.format(last_id=ids[-1]),
+    )
+
+    # New posts invalidate cached listings, and the last one
+    # is not cached yet, so every request below hits the database
+    ids = await create_posts(12)
+    many = await _count_statements(
+        client,
+        statements,
+        url.format(last_id=ids[-1]),
+    )
+
+    assert few == many
+    assert many <= 2
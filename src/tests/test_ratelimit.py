@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from core import ratelimit
+from core.ratelimit import InMemoryRateLimitBackend, RateLimiter, Rule
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def clock(monkeypatch) -> SimpleNamespace:
+    """
+    Time seen by the limiter, advanced by tests
+    """
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        ratelimit,
+        "time",
+        SimpleNamespace(monotonic=lambda: clock.now),
+    )
+    return clock
+
+
+async def test_rule_parse():
+    assert Rule.parse("10/minute") == Rule(capacity=10, rate=10 / 60)
+    assert Rule.parse("2/second") == Rule(capacity=2, rate=2)
+
+
+@pytest.mark.parametrize("value", ["10/week", "10", "0/minute", "-1/hour"])
+async def test_rule_parse_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        Rule.parse(value)
+
+
+async def test_bucket_refills_over_time(clock):
+    backend = InMemoryRateLimitBackend(max_keys=16, shards=1)
+    rule = Rule.parse("2/minute")
+
+    assert await backend.acquire("key", rule) == 0
+    assert await backend.acquire("key", rule) == 0
+    assert await backend.acquire("key", rule) == pytest.approx(30)
+
+    clock.now += 15
+    assert await backend.acquire("key", rule) == pytest.approx(15)
+
+    clock.now += 15
+    assert await backend.acquire("key", rule) == 0
+    assert await backend.acquire("key", rule) > 0
+
+    # A bucket never holds more than its capacity
+    clock.now += 3600
+    assert await backend.acquire("key", rule) == 0
+    assert await backend.acquire("key", rule) == 0
+    assert await backend.acquire("key", rule) > 0
+
+
+async def test_least_recently_used_bucket_is_evicted(clock):
+    backend = InMemoryRateLimitBackend(max_keys=2, shards=1)
+    rule = Rule.parse("1/hour")
+
+    for key in ("a", "b", "c"):
+        assert await backend.acquire(key, rule) == 0
+
+    assert len(backend) == 2
+    assert await backend.acquire("c", rule) > 0
+    # Evicted bucket starts full again
+    assert await backend.acquire("a", rule) == 0
+
+
+async def test_limiter_rejects_with_retry_after(clock):
+    limiter = RateLimiter(
+        InMemoryRateLimitBackend(max_keys=16, shards=4),
+        {"auth": Rule.parse("1/minute")},
+    )
+
+    await limiter.check("auth", "ip:1")
+    await limiter.check("auth", "ip:2")
+    # Groups without a rule are not limited
+    await limiter.check("write", "ip:1")
+    await limiter.check("write", "ip:1")
+
+    with pytest.raises(HTTPException) as error:
+        await limiter.check("auth", "ip:1")
+
+    assert error.value.status_code == 429
+    assert error.value.headers == {"Retry-After": "60"}
+    assert (limiter.allowed, limiter.rejected) == (2, 1)
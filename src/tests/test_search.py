@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import text
+
+from core.database import engine
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _search(client, query: str) -> list[str]:
+    response = await client.get("/posts/search", params={"q": query})
+    assert response.status_code == 200
+
+    return [post["slug"] for post in response.json()]
+
+
+async def test_search_ignores_markup(client, admin_headers, categories):
+    response = await client.post(
+        "/posts/",
+        json={
+            "title": "Markup",
+            "slug": "markup",
+            "content": "# Heading\n\nSome **bold** text",
+            "categories": categories[:1],
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 201
+
+    assert await _search(client, "bold") == ["markup"]
+    assert await _search(client, "heading") == ["markup"]
+    assert await _search(client, "strong") == []
+    assert await _search(client, "h1") == []
+
+
+async def test_search_follows_updates(client, admin_headers, create_posts):
+    post_id, other_id = await create_posts(2)
+
+    response = await client.patch(
+        f"/posts/{post_id}",
+        json={"title": "Renamed", "content": "Completely different words"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+
+    # Updates of columns outside the index leave it alone
+    response = await client.patch(
+        f"/posts/{other_id}",
+        json={"categories": []},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+
+    assert await _search(client, "renamed") == ["post-0"]
+    assert await _search(client, "different") == ["post-0"]
+    assert await _search(client, "content") == ["post-1"]
+
+    async with engine.begin() as connection:
+        await connection.execute(
+            text("INSERT INTO posts_fts(posts_fts) VALUES ('integrity-check')")
+        )
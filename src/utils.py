@@ -1,3 +1,5 @@
+import base64
+import binascii
 import re
 
 
@@ -11,3 +13,23 @@ def slugify(string: str) -> str:
     string = string.strip("_")
 
     return string
+
+
+def encode_cursor(value: int) -> str:
+    """
+    Encode integer key of the last seen row as an opaque pagination cursor
+    """
+    return base64.urlsafe_b64encode(str(value).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decode cursor created by `encode_cursor`.
+    Raise `ValueError` if cursor is malformed
+    """
+    padding = "=" * (-len(cursor) % 4)
+
+    try:
+        return int(base64.urlsafe_b64decode(cursor + padding).decode())
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError(f"Invalid cursor '{cursor}'") from exc